@@ -0,0 +1,166 @@
+from dataclasses import dataclass
+from functools import cached_property
+import json
+import pathlib
+from typing import Iterable
+
+import numpy as np
+
+from src.mechanics.card import Card
+
+STAT_COLUMNS = ["hp", "atk", "res", "spd"]
+
+
+def encode_strings(values: list[str]) -> tuple[np.ndarray, list[str]]:
+    """Dictionary-encodes strings into integer codes plus the list of distinct values."""
+    codes_by_value = {}
+    codes = np.fromiter(
+        (codes_by_value.setdefault(value, len(codes_by_value)) for value in values),
+        dtype=np.int32,
+        count=len(values),
+    )
+    return codes, list(codes_by_value)
+
+
+@dataclass
+class CardTable:
+    """Card stats stored column by column, for fast analysis of large collections.
+
+    Names and rarities are dictionary-encoded: `name_codes` and `rarity_codes`
+    index into `names` and `rarities`.
+    """
+
+    index: np.ndarray
+    hp: np.ndarray
+    atk: np.ndarray
+    res: np.ndarray
+    spd: np.ndarray
+    name_codes: np.ndarray
+    names: list[str]
+    rarity_codes: np.ndarray
+    rarities: list[str]
+
+    @classmethod
+    def from_cards(cls, cards: Iterable[Card]) -> "CardTable":
+        return cls.from_json([card.to_json() for card in cards])
+
+    @classmethod
+    def from_json(cls, cards_json: list[dict]) -> "CardTable":
+        def column(key: str) -> np.ndarray:
+            return np.fromiter(
+                (card[key] for card in cards_json), dtype=np.int32, count=len(cards_json)
+            )
+
+        name_codes, names = encode_strings([card["name"] for card in cards_json])
+
+        # Order the rarity dictionary by rarity index, so codes sort like rarities.
+        rarity_order = sorted(
+            {card["rarity"]: card.get("rarity_index", 0) for card in cards_json}.items(),
+            key=lambda item: item[1],
+        )
+        rarities = [name for name, _ in rarity_order]
+        rarity_codes_by_name = {name: code for code, name in enumerate(rarities)}
+        rarity_codes = np.fromiter(
+            (rarity_codes_by_name[card["rarity"]] for card in cards_json),
+            dtype=np.int8,
+            count=len(cards_json),
+        )
+
+        return cls(
+            index=column("index"),
+            hp=column("hp"),
+            atk=column("atk"),
+            res=column("res"),
+            spd=column("spd"),
+            name_codes=name_codes,
+            names=names,
+            rarity_codes=rarity_codes,
+            rarities=rarities,
+        )
+
+    @classmethod
+    def load(cls, collection_path: str) -> "CardTable":
+        """Loads an exported collection from its aggregate JSON file."""
+        collection_path = pathlib.Path(collection_path)
+        with open(collection_path / f"{collection_path.name}.json") as f:
+            return cls.from_json(json.load(f)["cards"])
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def column(self, stat: str) -> np.ndarray:
+        return getattr(self, stat)
+
+    def name_of(self, row: int) -> str:
+        return self.names[self.name_codes[row]]
+
+    def rarity_mask(self, rarity: str) -> np.ndarray:
+        if rarity not in self.rarities:
+            return np.zeros(len(self), dtype=bool)
+        return self.rarity_codes == self.rarities.index(rarity)
+
+    def filter(self, mask: np.ndarray) -> "CardTable":
+        """Returns the rows where mask is true, e.g. `table.filter(table.hp > 50)`."""
+        return CardTable(
+            index=self.index[mask],
+            hp=self.hp[mask],
+            atk=self.atk[mask],
+            res=self.res[mask],
+            spd=self.spd[mask],
+            name_codes=self.name_codes[mask],
+            names=self.names,
+            rarity_codes=self.rarity_codes[mask],
+            rarities=self.rarities,
+        )
+
+    @cached_property
+    def _rarity_order(self) -> tuple[np.ndarray, np.ndarray]:
+        """Row order that groups the rows by rarity, and where each rarity's group starts."""
+        order = np.argsort(self.rarity_codes, kind="stable")
+        counts = np.bincount(self.rarity_codes, minlength=len(self.rarities))
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        return order, starts
+
+    def group_by_rarity(self, stat: str) -> dict[str, dict[str, float]]:
+        """Returns the count, mean, min, max and standard deviation of a stat for each rarity."""
+        order, starts = self._rarity_order
+        counts = np.diff(np.append(starts, len(self)))
+        present = counts > 0
+        if not present.any():
+            return {}
+
+        # With the rows grouped by rarity, each aggregate is a single reduceat call.
+        values = self.column(stat)[order].astype(np.int64)
+        group_starts = starts[present]
+        sums = np.add.reduceat(values, group_starts)
+        squared_sums = np.add.reduceat(values * values, group_starts)
+        minimums = np.minimum.reduceat(values, group_starts)
+        maximums = np.maximum.reduceat(values, group_starts)
+
+        groups = {}
+        present_rarities = [rarity for rarity, count in zip(self.rarities, counts) if count > 0]
+        for i, (rarity, count) in enumerate(zip(present_rarities, counts[present])):
+            mean = sums[i] / count
+            groups[rarity] = {
+                "count": int(count),
+                "mean": float(mean),
+                "min": float(minimums[i]),
+                "max": float(maximums[i]),
+                "std": float(np.sqrt(max(squared_sums[i] / count - mean * mean, 0.0))),
+            }
+        return groups
+
+    def histogram(self, stat: str, bins: int = 10) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the counts and bin edges of a stat's distribution."""
+        return np.histogram(self.column(stat), bins=bins)
+
+    def report(self) -> str:
+        lines = [f"{len(self)} cards"]
+        for stat in STAT_COLUMNS:
+            lines.append(f"{stat.upper()}:")
+            for rarity, group in self.group_by_rarity(stat).items():
+                lines.append(
+                    f"  {rarity:<10} n={group['count']:<8} mean={group['mean']:7.2f} "
+                    f"std={group['std']:6.2f} min={group['min']:5.0f} max={group['max']:5.0f}"
+                )
+        return "\n".join(lines)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+
+import argparse
+import pathlib
+import random
+import tempfile
+import time
+
+from PIL import Image, ImageDraw
+
+from render_cards import (
+    IDEAL_CARD_WIDTH,
+    RARITY_SYMBOL_SIZES,
+    RARITY_SYMBOLS,
+    STAT_FONT_PATH,
+    STAT_FONT_SIZE,
+    SYMBOL_FONT_PATH,
+    TITLE_FONT_PATH,
+    TITLE_FONT_SIZE,
+    render_card,
+)
+from src.mechanics.card import Card
+from src.mechanics.element import NEUTRAL
+from src.pokemon_content.pokemon_rarity import PokemonRarity
+from src.rendering.asset_cache import asset_cache
+from src.rendering.resource_registry import resource_registry
+
+ART_SIZE = 1024
+
+
+def render_card_uncompiled(card: Card, collection_path: str) -> Image.Image:
+    """Renders a card the way render_card did before card layouts, for comparison."""
+    card_image = resource_registry().card_template(NEUTRAL).copy()
+    card_art_path = pathlib.Path(collection_path, "images", card.image_file)
+
+    canvas = Image.new("RGBA", card_image.size, (0, 0, 0, 0))
+    card_art_image = Image.open(card_art_path)
+    rescale_factor = IDEAL_CARD_WIDTH / card_art_image.size[0]
+    card_art_image = card_art_image.resize(
+        (
+            int(card_art_image.size[0] * rescale_factor),
+            int(card_art_image.size[1] * rescale_factor),
+        )
+    )
+    monster_image_x = card_image.size[0] / 2 - card_art_image.size[0] / 2
+    monster_image_y = 330 - card_art_image.size[1] / 2
+    canvas.paste(card_art_image, (int(monster_image_x), int(monster_image_y)))
+    canvas.paste(card_image, (0, 0), card_image)
+    card_image = canvas
+
+    draw = ImageDraw.Draw(card_image)
+    title_font = asset_cache().get_font(TITLE_FONT_PATH, TITLE_FONT_SIZE)
+    draw.text((160, 85), card.name, font=title_font, fill=(0, 0, 0), anchor="ls")
+    stat_font = asset_cache().get_font(STAT_FONT_PATH, STAT_FONT_SIZE)
+    for position, text in [
+        ((180, 555), f"{card.hp} PV"),
+        ((165, 615), f"{card.atk} ATK"),
+        ((165, 665), f"{card.res} RES"),
+        ((180, 713), f"{card.spd} SPD"),
+    ]:
+        draw.text(position, text, font=stat_font, fill=(0, 0, 0), anchor="rs")
+
+    symbol_font = asset_cache().get_font(
+        SYMBOL_FONT_PATH, RARITY_SYMBOL_SIZES[card.rarity.index]
+    )
+    draw.text(
+        (card_image.width - 64, 605),
+        RARITY_SYMBOLS[card.rarity.index],
+        font=symbol_font,
+        fill=(0, 0, 0),
+        anchor="mm",
+    )
+    return card_image
+
+
+def build_collection(collection_path: pathlib.Path, n: int) -> list[Card]:
+    random.seed(0)
+    images_path = collection_path / "images"
+    images_path.mkdir(parents=True)
+    cards = []
+    for i in range(n):
+        card = Card(
+            index=i + 1,
+            name=f"Card {i}",
+            rarity=random.choice(PokemonRarity.ALL),
+            hp=random.randint(1, 10) * 10,
+            atk=random.randint(4, 10),
+            res=random.randint(1, 8),
+            spd=random.randint(1, 10),
+        )
+        art = Image.effect_noise((ART_SIZE, ART_SIZE), 64).convert("RGB")
+        art.save(images_path / card.image_file)
+        cards.append(card)
+    return cards
+
+
+def measure(render, cards: list[Card], collection_path: str) -> float:
+    # Render once first so template and font loading isn't counted.
+    render(cards[0], collection_path)
+    start_time = time.perf_counter()
+    for card in cards:
+        render(card, collection_path)
+    return (time.perf_counter() - start_time) / len(cards)
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("-n", "--count", type=int, default=50)
+    n = argparser.parse_args().count
+
+    with tempfile.TemporaryDirectory() as temporary_path:
+        collection_path = pathlib.Path(temporary_path, "benchmark")
+        cards = build_collection(collection_path, n)
+
+        uncompiled = render_card_uncompiled(cards[0], str(collection_path))
+        compiled = render_card(cards[0], str(collection_path))
+        if uncompiled.tobytes() != compiled.tobytes():
+            raise RuntimeError("Compiled layout renders differ from uncompiled renders.")
+
+        uncompiled_time = measure(render_card_uncompiled, cards, str(collection_path))
+        compiled_time = measure(render_card, cards, str(collection_path))
+
+    print(f"Render time per card ({n} cards, {ART_SIZE}x{ART_SIZE} art):")
+    print(f"  uncompiled template   {uncompiled_time * 1000:8.2f} ms")
+    print(
+        f"  compiled card layout  {compiled_time * 1000:8.2f} ms  "
+        f"({uncompiled_time / compiled_time:.2f}x faster)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+
+import argparse
+import random
+import tracemalloc
+
+from src.content.style import Style, intern_style
+from src.mechanics.card import Card
+from src.pokemon_content.pokemon_rarity import PokemonRarity
+
+SUBJECTS = ["orc", "elf", "gnome", "goblin", "reptile", "dragon", "mantis", "beetle"]
+ADJECTIVES = ["simple", "basic", "strong", "special", "legendary", "epic", "mythical"]
+AMBIENCES = ["parchment", "old paper"]
+
+
+class DictCard:
+    """A card laid out like the dataclasses were before __slots__, for comparison."""
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+def random_style() -> Style:
+    # Build fresh strings, like styles assembled card by card during generation.
+    return Style(
+        subject="".join(random.choice(SUBJECTS)),
+        subject_type="Moster",
+        subject_adjectives=("".join(random.choice(ADJECTIVES)),),
+        ambience=f"{random.choice(AMBIENCES)} background",
+        style_suffix="--niji",
+    )
+
+
+def build_cards(n: int, layout: str) -> list:
+    cards = []
+    for i in range(n):
+        style = random_style()
+        fields = dict(
+            index=i + 1,
+            name=f"Card {i}",
+            rarity=random.choice(PokemonRarity.ALL),
+            hp=random.randint(1, 10) * 10,
+            atk=random.randint(4, 10),
+            res=random.randint(1, 8),
+            spd=random.randint(1, 10),
+        )
+        if layout == "dict":
+            style_dict = DictCard(**{name: getattr(style, name) for name in Style.__slots__})
+            cards.append(DictCard(**fields, part_of_evolution=False, style=style_dict))
+        elif layout == "slots":
+            cards.append(Card(**fields, style=style))
+        else:
+            cards.append(Card(**fields, style=intern_style(style)))
+    return cards
+
+
+def measure(n: int, layout: str) -> int:
+    random.seed(0)
+    tracemalloc.start()
+    cards = build_cards(n, layout)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del cards
+    return size
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("-n", "--count", type=int, default=100000)
+    n = argparser.parse_args().count
+
+    layouts = [
+        ("dict", "__dict__ cards, one style per card"),
+        ("slots", "__slots__ cards, one style per card"),
+        ("shared", "__slots__ cards, shared interned styles"),
+    ]
+    baseline = None
+    print(f"Memory for {n} cards:")
+    for layout, description in layouts:
+        size = measure(n, layout)
+        baseline = baseline or size
+        print(
+            f"  {description:<42} {size / 2**20:8.1f} MiB  "
+            f"{size / n:6.0f} B/card  ({1 - size / baseline:5.1%} saved)"
+        )
+
+
+if __name__ == "__main__":
+    main()
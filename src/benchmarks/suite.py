@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+
+import argparse
+from contextlib import redirect_stdout
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from functools import cached_property
+import hashlib
+import io
+import json
+import os
+import pathlib
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.card_layout import build_collection
+from generate import create_classic_collection
+from render_cards import render_card
+from src.mechanics.ability import Ability
+from src.pokemon_content.pokemon_elements import PokemonElements
+from src.pokemon_content.pokemon_rarity import PokemonRarity
+from src.util.ability_name_library import ability_name_index, get_ability_name
+from src.util.completion_cache import Completion
+from src.util.gpt_call import CACHE_MODE_OFF, GeminiAIClient
+
+DEFAULT_HISTORY_PATH = "../data/benchmark_history.jsonl"
+DEFAULT_BASELINE_PATH = "../data/benchmark_baseline.json"
+DEFAULT_THRESHOLD = 0.10
+
+NAME_SYLLABLES = ["zor", "ba", "ki", "mon", "ra", "vel", "tur", "ix", "lo", "dra", "pu", "sha"]
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    value: float
+    unit: str
+    higher_is_better: bool
+
+
+class OfflineGeminiClient(GeminiAIClient):
+    """Answers every prompt with a made-up name derived from the prompt, without any network.
+
+    The same prompt always gets the same answer, so benchmark runs are deterministic.
+    """
+
+    @cached_property
+    def cache_mode(self) -> str:
+        return CACHE_MODE_OFF
+
+    @cached_property
+    def is_gemini_enabled(self):
+        return True
+
+    def generate_content(self, prompt: str) -> Completion:
+        digest = hashlib.sha256(prompt.encode()).digest()
+        name = "".join(NAME_SYLLABLES[byte % len(NAME_SYLLABLES)] for byte in digest[:3])
+        return Completion(name.capitalize())
+
+
+def benchmark_generate_card(n: int) -> BenchmarkResult:
+    random.seed(0)
+    collection = create_classic_collection()
+    start_time = time.perf_counter()
+    for _ in range(n):
+        collection.generate_card(
+            PokemonElements.NEUTRAL, random.choice(PokemonRarity.ALL)
+        )
+    elapsed_time = time.perf_counter() - start_time
+    return BenchmarkResult("generate_card", n / elapsed_time, "cards/s", True)
+
+
+def benchmark_export(n: int, output_path: str) -> BenchmarkResult:
+    random.seed(0)
+    collection = create_classic_collection()
+    for _ in range(n):
+        collection.generate_card(PokemonElements.NEUTRAL, random.choice(PokemonRarity.ALL))
+
+    start_time = time.perf_counter()
+    collection.export(output_path=output_path)
+    elapsed_time = time.perf_counter() - start_time
+    return BenchmarkResult("collection_export", n / elapsed_time, "cards/s", True)
+
+
+def benchmark_ability_names(n: int) -> BenchmarkResult:
+    random.seed(0)
+    abilities = [
+        Ability(
+            name="Untitled Ability",
+            element=element,
+            cost=random.randint(1, 4),
+            is_mixed_element=not element.is_neutral and random.random() < 0.5,
+        )
+        for element in random.choices(PokemonElements.ALL, k=1000)
+    ]
+    # Load the library up front, so only the lookups are timed.
+    ability_name_index().names_by_key
+
+    start_time = time.perf_counter()
+    for i in range(n):
+        get_ability_name(abilities[i % len(abilities)])
+    elapsed_time = time.perf_counter() - start_time
+    return BenchmarkResult("get_ability_name", n / elapsed_time, "lookups/s", True)
+
+
+def benchmark_render_card(n: int, collection_path: pathlib.Path) -> BenchmarkResult:
+    cards = build_collection(collection_path, n)
+    # Render once first so template and font loading isn't counted.
+    render_card(cards[0], str(collection_path))
+
+    latencies = []
+    for card in cards:
+        start_time = time.perf_counter()
+        render_card(card, str(collection_path))
+        latencies.append(time.perf_counter() - start_time)
+    return BenchmarkResult(
+        "render_card", statistics.median(latencies) * 1000, "ms/card", False
+    )
+
+
+def run_benchmarks(n_cards: int, n_lookups: int, n_renders: int, repeat: int) -> list[BenchmarkResult]:
+    """Runs every benchmark `repeat` times, keeping the best result of each."""
+    GeminiAIClient.SINGLETON_CLIENT = OfflineGeminiClient()
+
+    best_results: dict[str, BenchmarkResult] = {}
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as temporary_path, redirect_stdout(io.StringIO()):
+            results = [
+                benchmark_generate_card(n_cards),
+                benchmark_export(n_cards, temporary_path),
+                benchmark_ability_names(n_lookups),
+                benchmark_render_card(n_renders, pathlib.Path(temporary_path, "renders")),
+            ]
+
+        for result in results:
+            best = best_results.get(result.name)
+            is_better = best is None or (
+                result.value > best.value
+                if result.higher_is_better
+                else result.value < best.value
+            )
+            if is_better:
+                best_results[result.name] = result
+    return list(best_results.values())
+
+
+def find_regressions(
+    results: list[BenchmarkResult], baseline: dict[str, dict], threshold: float
+) -> dict[str, float]:
+    """Returns how much worse than the baseline (as a fraction) each regressed benchmark is."""
+    regressions = {}
+    for result in results:
+        if result.name not in baseline:
+            continue
+        baseline_value = baseline[result.name]["value"]
+        if result.higher_is_better:
+            change = 1 - result.value / baseline_value
+        else:
+            change = result.value / baseline_value - 1
+        if change > threshold:
+            regressions[result.name] = change
+    return regressions
+
+
+def append_history(path: str, results: list[BenchmarkResult]):
+    entry = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "results": {result.name: result.value for result in results},
+    }
+    with open(path, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def load_baseline(path: str) -> dict[str, dict]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, results: list[BenchmarkResult]):
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w") as f:
+        json.dump({result.name: asdict(result) for result in results}, f, indent=2)
+    os.replace(temporary_path, path)
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument("--cards", type=int, default=500, help="Cards to generate and export.")
+    argparser.add_argument("--lookups", type=int, default=100000, help="Ability name lookups.")
+    argparser.add_argument("--renders", type=int, default=20, help="Cards to render.")
+    argparser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark (best kept).")
+    argparser.add_argument("--history", default=DEFAULT_HISTORY_PATH)
+    argparser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    argparser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Flag benchmarks more than this fraction worse than the baseline.",
+    )
+    argparser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Save this run's results as the new baseline.",
+    )
+    args = argparser.parse_args()
+
+    results = run_benchmarks(args.cards, args.lookups, args.renders, args.repeat)
+    baseline = load_baseline(args.baseline)
+    regressions = find_regressions(results, baseline, args.threshold)
+    append_history(args.history, results)
+
+    print(f"{'benchmark':<20} {'result':>14} {'':<10} {'baseline':>12}")
+    for result in results:
+        baseline_value = baseline.get(result.name, {}).get("value")
+        baseline_text = f"{baseline_value:12.2f}" if baseline_value is not None else f"{'-':>12}"
+        line = f"{result.name:<20} {result.value:14.2f} {result.unit:<10} {baseline_text}"
+        if result.name in regressions:
+            # Print in red ASCII.
+            line += f"\033[91m  REGRESSION ({regressions[result.name]:.1%} worse)\033[0m"
+        print(line)
+
+    if args.update_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Saved baseline to {args.baseline}.")
+
+    if len(regressions) > 0 and not args.update_baseline:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
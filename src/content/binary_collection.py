@@ -0,0 +1,298 @@
+import argparse
+import json
+import mmap
+import pathlib
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from typing import Iterable, Iterator
+
+from src.content.collection_exporter import DEFAULT_OUTPUT_PATH, CollectionExporter
+from src.mechanics.card import Card
+from src.pokemon_content.pokemon_card_json import card_from_json
+from src.pokemon_content.pokemon_elements import PokemonElements
+from src.pokemon_content.pokemon_rarity import PokemonRarity
+
+BINARY_COLLECTION_SUFFIX = ".pkcb"
+MAGIC = b"PKCB"
+VERSION = 2
+
+# Magic, version, card count, then the offsets of the string table and the name index.
+HEADER = struct.Struct("<4sHxxIQQ")
+
+# One fixed-width record per card: index, rarity index, HP, ATK, RES, SPD, then the
+# (offset, length) in the string table of the name, the rarity name, the element name
+# and the image prompt.
+RECORD = struct.Struct("<IBxxxiiiiQIQIQIQI")
+
+# The name index is an open-addressing hash table of record positions (+1, 0 is empty).
+NAME_SLOT = struct.Struct("<I")
+
+EMPTY_SLOT = 0
+
+
+def name_hash(name: str) -> int:
+    # crc32 is stable across processes, unlike hash().
+    return zlib.crc32(name.encode())
+
+
+def write_binary_collection(path: str | pathlib.Path, cards: Iterable[Card]) -> int:
+    """Writes cards to the binary collection format in one pass, returning the card count.
+
+    Records are written as the cards arrive; the strings are staged in a temporary
+    file, so only the name hashes are held in memory.
+    """
+    string_offsets: dict[str, int] = {}  # Deduplicates the (few) rarity names.
+    name_hashes = array("I")
+
+    with open(path, "wb") as f, tempfile.TemporaryFile() as strings:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+
+        def add_string(text: str, deduplicate: bool = False) -> tuple[int, int]:
+            if deduplicate and text in string_offsets:
+                offset = string_offsets[text]
+            else:
+                offset = strings.tell()
+                strings.write(text.encode())
+                if deduplicate:
+                    string_offsets[text] = offset
+            return offset, len(text.encode())
+
+        for card in cards:
+            name_offset, name_length = add_string(card.name)
+            rarity_offset, rarity_length = add_string(card.rarity.name, deduplicate=True)
+            element_offset, element_length = add_string(card.element.name, deduplicate=True)
+            prompt_offset, prompt_length = add_string(card.image_prompt or "")
+            f.write(
+                RECORD.pack(
+                    card.index,
+                    card.rarity.index,
+                    card.hp,
+                    card.atk,
+                    card.res,
+                    card.spd,
+                    name_offset,
+                    name_length,
+                    rarity_offset,
+                    rarity_length,
+                    element_offset,
+                    element_length,
+                    prompt_offset,
+                    prompt_length,
+                )
+            )
+            name_hashes.append(name_hash(card.name))
+
+        n_cards = len(name_hashes)
+        string_table_offset = f.tell()
+        strings.seek(0)
+        while chunk := strings.read(1 << 20):
+            f.write(chunk)
+
+        # Keep the table at most half full so probes stay short.
+        n_slots = 1
+        while n_slots < n_cards * 2:
+            n_slots *= 2
+        slots = array("I", [EMPTY_SLOT]) * n_slots
+        for position, hash_value in enumerate(name_hashes):
+            slot = hash_value & (n_slots - 1)
+            while slots[slot] != EMPTY_SLOT:
+                slot = (slot + 1) & (n_slots - 1)
+            slots[slot] = position + 1
+
+        name_index_offset = f.tell()
+        if sys.byteorder == "big":
+            slots.byteswap()
+        f.write(slots.tobytes())
+
+        f.seek(0)
+        f.write(
+            HEADER.pack(MAGIC, VERSION, n_cards, string_table_offset, name_index_offset)
+        )
+    return n_cards
+
+
+class BinaryCollection:
+    """Read-only, memory-mapped view of a binary collection file.
+
+    Any card can be loaded by position or by name without reading the others.
+    """
+
+    def __init__(self, path: str | pathlib.Path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, n_cards, string_table_offset, name_index_offset = (
+            HEADER.unpack_from(self._data, 0)
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} binary collection.")
+
+        self.n_cards = n_cards
+        self._string_table_offset = string_table_offset
+        self._name_index_offset = name_index_offset
+        self._n_slots = (len(self._data) - name_index_offset) // NAME_SLOT.size
+
+    def __len__(self) -> int:
+        return self.n_cards
+
+    def __iter__(self) -> Iterator[Card]:
+        for position in range(self.n_cards):
+            yield self.card(position)
+
+    def __enter__(self) -> "BinaryCollection":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._data.close()
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._string_table_offset + offset
+        return self._data[start : start + length].decode()
+
+    def record(self, position: int) -> tuple:
+        if not 0 <= position < self.n_cards:
+            raise IndexError(f"Card {position} is out of range.")
+        return RECORD.unpack_from(self._data, HEADER.size + position * RECORD.size)
+
+    def card_name(self, position: int) -> str:
+        record = self.record(position)
+        return self._string(record[6], record[7])
+
+    def card(self, position: int) -> Card:
+        (
+            index,
+            rarity_index,
+            hp,
+            atk,
+            res,
+            spd,
+            name_offset,
+            name_length,
+            rarity_offset,
+            rarity_length,
+            element_offset,
+            element_length,
+            prompt_offset,
+            prompt_length,
+        ) = self.record(position)
+
+        return Card(
+            index=index,
+            name=self._string(name_offset, name_length),
+            rarity=PokemonRarity.get_rarity_by_name(self._string(rarity_offset, rarity_length)),
+            hp=hp,
+            atk=atk,
+            res=res,
+            spd=spd,
+            element=PokemonElements.get_element_by_name(
+                self._string(element_offset, element_length)
+            ),
+            image_prompt=self._string(prompt_offset, prompt_length),
+        )
+
+    def find_position(self, name: str) -> int | None:
+        if self._n_slots == 0:
+            return None
+
+        slot = name_hash(name) & (self._n_slots - 1)
+        while True:
+            (entry,) = NAME_SLOT.unpack_from(
+                self._data, self._name_index_offset + slot * NAME_SLOT.size
+            )
+            if entry == EMPTY_SLOT:
+                return None
+            if self.card_name(entry - 1) == name:
+                return entry - 1
+            slot = (slot + 1) & (self._n_slots - 1)
+
+    def find(self, name: str) -> Card | None:
+        position = self.find_position(name)
+        return self.card(position) if position is not None else None
+
+
+def get_binary_collection_path(collection_path: str | pathlib.Path) -> pathlib.Path:
+    collection_path = pathlib.Path(collection_path)
+    return collection_path / f"{collection_path.name}{BINARY_COLLECTION_SUFFIX}"
+
+
+def json_to_binary(
+    collection_path: str | pathlib.Path, binary_path: str | pathlib.Path | None = None
+) -> pathlib.Path:
+    """Converts an exported collection's aggregate JSON into the binary format."""
+    collection_path = pathlib.Path(collection_path)
+    binary_path = binary_path or get_binary_collection_path(collection_path)
+    with open(collection_path / f"{collection_path.name}.json") as f:
+        cards_json = json.load(f)["cards"]
+
+    write_binary_collection(binary_path, (card_from_json(data) for data in cards_json))
+    return pathlib.Path(binary_path)
+
+
+def binary_to_json(
+    binary_path: str | pathlib.Path,
+    collection_name: str | None = None,
+    output_path: str = DEFAULT_OUTPUT_PATH,
+    non_destructive: bool = True,
+):
+    """Exports a binary collection back into the JSON collection layout."""
+    collection_name = collection_name or pathlib.Path(binary_path).stem
+    with BinaryCollection(binary_path) as collection, CollectionExporter(
+        collection_name, output_path=output_path, non_destructive=non_destructive
+    ) as exporter:
+        for card in collection:
+            exporter.write_card(card)
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        description="Converts collections between the JSON layout and the binary format."
+    )
+    subparsers = argparser.add_subparsers(dest="command", required=True)
+
+    to_binary_parser = subparsers.add_parser(
+        "to-binary", help="Writes an exported collection's cards to its binary file."
+    )
+    to_binary_parser.add_argument("collection", help="File path to the exported collection.")
+    to_binary_parser.add_argument(
+        "-o",
+        "--output",
+        default=None,
+        help="Binary file to write (<collection>/<name>.pkcb by default).",
+    )
+
+    to_json_parser = subparsers.add_parser(
+        "to-json", help="Exports a binary file back into the JSON collection layout."
+    )
+    to_json_parser.add_argument("binary", help=f"File path to the {BINARY_COLLECTION_SUFFIX} file.")
+    to_json_parser.add_argument(
+        "--name", default=None, help="Collection name (the binary file's name by default)."
+    )
+    to_json_parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT_PATH)
+    to_json_parser.add_argument(
+        "--destructive",
+        action="store_true",
+        help="Rewrite every card file instead of only the ones that changed.",
+    )
+
+    args = argparser.parse_args()
+    if args.command == "to-binary":
+        binary_path = json_to_binary(args.collection, args.output)
+        print(f"Wrote {binary_path}.")
+    else:
+        binary_to_json(
+            args.binary,
+            collection_name=args.name,
+            output_path=args.output,
+            non_destructive=not args.destructive,
+        )
+
+
+if __name__ == "__main__":
+    main()
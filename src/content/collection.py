@@ -1,13 +1,14 @@
 from dataclasses import dataclass, field
-import json
-import os
 import random
-import shutil
+from typing import Iterable, Iterator
 
+from src.content.collection_exporter import DEFAULT_OUTPUT_PATH, CollectionExporter
 from src.content.style import Style
+from src.mechanics.ability import Ability
 from src.mechanics.card import Card
 from src.mechanics.element import Element
 from src.mechanics.rarity import Rarity
+from src.util.ability_name_library import get_ability_name
 
 
 @dataclass
@@ -23,6 +24,32 @@ class Collection:
     # Prevent duplicate cards and names.
     subjects_seen: set[str] = field(default_factory=set)
     card_names_seen: set[str] = field(default_factory=set)
+    ability_names_seen: set[str] = field(default_factory=set)
+
+    # Cards are only kept in `cards` while this is set (see iter_cards).
+    keep_cards: bool = True
+    n_cards_generated: int = 0
+
+    def iter_cards(
+        self,
+        n: int,
+        element: Element = None,
+        subject_override: str = None,
+        keep_cards: bool = True,
+    ) -> Iterator[Card]:
+        """Yields n new cards, one at a time as each is finished.
+
+        With keep_cards=False the cards aren't kept in the collection, so memory
+        stays flat however many cards are streamed.
+        """
+        previous_keep_cards = self.keep_cards
+        self.keep_cards = keep_cards
+        try:
+            for _ in range(n):
+                card_element = element if element else random.choice(self.elements)
+                yield from self.generate_card_series(card_element, 1, subject_override)
+        finally:
+            self.keep_cards = previous_keep_cards
 
     def generate_random_cards(
         self, element: Element = None, subject_override: str = None
@@ -69,6 +96,21 @@ class Collection:
     ) -> Card:
         pass
 
+    def get_ability_name(self, ability: Ability) -> str:
+        """Picks a name for the ability that no other ability in the collection has yet.
+
+        Names only repeat once every name for the ability's key has been used.
+        """
+        return get_ability_name(ability, self.ability_names_seen)
+
+    def add_card(self, card: Card):
+        self.n_cards_generated += 1
+        if self.keep_cards:
+            self.cards.append(card)
+
+    def next_card_index(self) -> int:
+        return self.n_cards_generated + 1
+
     def get_default_element(self) -> Element:
         return self.elements[0]
 
@@ -78,34 +120,35 @@ class Collection:
             "cards": [card.to_json() for card in self.cards],
         }
 
-    def export(self):
-        collection_path = f"./output/{self.collection_name}/"
-        cards_folder = f"./output/{self.collection_name}/cards"
-        images_folder = f"./output/{self.collection_name}/images"
-        rendered_cards_folder = f"./output/{self.collection_name}/renders"
-
-        # If collection path exists, delete it.
-        if os.path.exists(collection_path):
-            shutil.rmtree(collection_path)
-
-        os.makedirs(collection_path, exist_ok=True)
-        os.makedirs(cards_folder, exist_ok=True)
-        os.makedirs(images_folder, exist_ok=True)
-        os.makedirs(rendered_cards_folder, exist_ok=True)
-
-        # Export entire collection as a single file.
-        with open(f"{collection_path}/{self.collection_name}.json", "w") as f:
-            json.dump(self.to_json(), f, indent=2)
-
-        # Export the collection's cards.
-        for card in self.cards:
-            card_path = f"{cards_folder}/{card.index:03d}_{card.snake_case_name}.json"
-            with open(card_path, "w") as f:
-                json.dump(card.to_json(), f, indent=2)
-
-        # Export all image prompts so its easy to generate images.
-        with open(f"{collection_path}/_image_prompts.txt", "w") as f:
-            for card in self.cards:
-                f.write(f"[{card.index:03d}] {card.name}\n")
-                f.write(card.image_prompt)
-                f.write("\n\n")
+    def export(
+        self,
+        cards: Iterable[Card] | None = None,
+        compact: bool = False,
+        non_destructive: bool = False,
+        output_path: str = DEFAULT_OUTPUT_PATH,
+    ):
+        """Exports the given cards (all of the collection's cards by default) in a single pass.
+
+        A non_destructive export only replaces the card files that changed.
+        """
+        for _ in self.iter_export(cards, compact, non_destructive, output_path):
+            pass
+
+    def iter_export(
+        self,
+        cards: Iterable[Card] | None = None,
+        compact: bool = False,
+        non_destructive: bool = False,
+        output_path: str = DEFAULT_OUTPUT_PATH,
+    ) -> Iterator[Card]:
+        """Exports cards as they pass through, yielding each one once it's written."""
+        cards = self.cards if cards is None else cards
+        with CollectionExporter(
+            self.collection_name,
+            output_path=output_path,
+            compact=compact,
+            non_destructive=non_destructive,
+        ) as exporter:
+            for card in cards:
+                exporter.write_card(card)
+                yield card
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+
+from src.mechanics.card import Card
+
+DEFAULT_OUTPUT_PATH = "./output"
+
+
+class CollectionExporter:
+    """Writes a collection's files one card at a time.
+
+    The aggregate JSON, the per-card JSON files and the image prompts are all
+    written in the same pass, so memory use doesn't grow with the collection.
+
+    By default the existing collection folder is deleted first. A non-destructive
+    export writes into a staging folder instead, then only swaps in the card files
+    whose content changed, leaving the art and renders of every other card alone.
+    """
+
+    def __init__(
+        self,
+        collection_name: str,
+        output_path: str = DEFAULT_OUTPUT_PATH,
+        compact: bool = False,
+        non_destructive: bool = False,
+    ):
+        self.collection_name = collection_name
+        self.compact = compact
+        self.non_destructive = non_destructive
+        self.collection_path = f"{output_path}/{collection_name}/"
+        self.cards_folder = f"{output_path}/{collection_name}/cards"
+        self.images_folder = f"{output_path}/{collection_name}/images"
+        self.rendered_cards_folder = f"{output_path}/{collection_name}/renders"
+        self.staging_path = f"{output_path}/.{collection_name}.staging"
+        self.cards_written = 0
+
+        # Where files are written before they're moved into place (if they are).
+        self._write_path = self.staging_path if non_destructive else self.collection_path
+
+        self._collection_file = None
+        self._prompts_file = None
+
+    def __enter__(self) -> "CollectionExporter":
+        # If the folder we write to exists, delete it.
+        if os.path.exists(self._write_path):
+            shutil.rmtree(self._write_path)
+
+        os.makedirs(self.collection_path, exist_ok=True)
+        os.makedirs(self.cards_folder, exist_ok=True)
+        os.makedirs(self.images_folder, exist_ok=True)
+        os.makedirs(self.rendered_cards_folder, exist_ok=True)
+        os.makedirs(f"{self._write_path}/cards", exist_ok=True)
+
+        self._collection_file = open(
+            f"{self._write_path}/{self.collection_name}.json", "w"
+        )
+        self._prompts_file = open(f"{self._write_path}/_image_prompts.txt", "w")
+
+        collection_name = json.dumps(self.collection_name)
+        if self.compact:
+            self._collection_file.write(f'{{"collection_name":{collection_name},"cards":[')
+        else:
+            self._collection_file.write(
+                f'{{\n  "collection_name": {collection_name},\n  "cards": ['
+            )
+        return self
+
+    def write_card(self, card: Card):
+        card_json = self.dumps(card.to_json())
+
+        # Export entire collection as a single file, one card at a time.
+        separator = "," if self.cards_written > 0 else ""
+        if self.compact:
+            self._collection_file.write(f"{separator}{card_json}")
+        else:
+            # Match the layout json.dump(indent=2) gives cards nested in the collection.
+            nested_card_json = card_json.replace("\n", "\n    ")
+            self._collection_file.write(f"{separator}\n    {nested_card_json}")
+
+        # Export the card on its own.
+        card_path = f"{self._write_path}/cards/{card.index:03d}_{card.snake_case_name}.json"
+        with open(card_path, "w") as f:
+            f.write(card_json)
+
+        # Export all image prompts so its easy to generate images.
+        self._prompts_file.write(f"[{card.index:03d}] {card.name}\n")
+        self._prompts_file.write(card.image_prompt)
+        self._prompts_file.write("\n\n")
+
+        self.cards_written += 1
+
+    def dumps(self, data: dict) -> str:
+        if self.compact:
+            return json.dumps(data, separators=(",", ":"))
+        return json.dumps(data, indent=2)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.compact:
+            self._collection_file.write("]}")
+        elif self.cards_written == 0:
+            self._collection_file.write("]\n}")
+        else:
+            self._collection_file.write("\n  ]\n}")
+
+        self._collection_file.close()
+        self._prompts_file.close()
+
+        if self.non_destructive:
+            if exc_type is None:
+                self._swap_in_staged_files()
+            shutil.rmtree(self.staging_path, ignore_errors=True)
+
+    def _swap_in_staged_files(self):
+        staged_cards_folder = f"{self.staging_path}/cards"
+        staged_card_names = set(os.listdir(staged_cards_folder))
+        changed, unchanged, removed = 0, 0, 0
+
+        for card_name in sorted(staged_card_names):
+            staged_card_path = f"{staged_cards_folder}/{card_name}"
+            card_path = f"{self.cards_folder}/{card_name}"
+            if os.path.exists(card_path) and hash_file(card_path) == hash_file(staged_card_path):
+                unchanged += 1
+                continue
+
+            # Replacing a file is atomic, so readers never see a half-written card.
+            os.replace(staged_card_path, card_path)
+            changed += 1
+
+        # Remove the cards (and their renders) that are no longer in the collection.
+        removed_card_stems = set()
+        for card_name in os.listdir(self.cards_folder):
+            if card_name.endswith(".json") and card_name not in staged_card_names:
+                os.remove(f"{self.cards_folder}/{card_name}")
+                removed_card_stems.add(card_name[:-len(".json")])
+                removed += 1
+        # Renders exist at every level (renders/<level>/) and in every format.
+        for render_path in pathlib.Path(self.rendered_cards_folder).rglob("*"):
+            if render_path.is_file() and render_path.stem in removed_card_stems:
+                render_path.unlink()
+
+        for file_name in [f"{self.collection_name}.json", "_image_prompts.txt"]:
+            os.replace(f"{self.staging_path}/{file_name}", f"{self.collection_path}/{file_name}")
+
+        print(
+            f"Exported {self.collection_name}: {changed} cards changed, "
+            f"{unchanged} unchanged, {removed} removed."
+        )
+
+
+def hash_file(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
@@ -1,13 +1,18 @@
-from dataclasses import dataclass, field
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+import sys
 
+# How many distinct styles intern_style keeps, so a long streaming run stays flat in memory.
+MAX_INTERNED_STYLES = 4096
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class Style:
 
     # Subject: The main character of the card.
     subject: str = None
     subject_type: str = "monster"
-    subject_adjectives: list[str] = field(default_factory=list)
+    subject_adjectives: tuple[str, ...] = ()
 
     # Detail: Something describing the subject.
     detail: str | None = None
@@ -21,3 +26,35 @@ class Style:
     # The name of the style.
     style_prefix: str = ""
     style_suffix: str = ""
+
+
+# Shared Style instances, least recently used first (see intern_style).
+_INTERNED_STYLES: OrderedDict[Style, Style] = OrderedDict()
+
+
+def intern_style(style: Style) -> Style:
+    """Returns a shared Style equal to the given one, with its strings interned.
+
+    Cards with identical styles then point at one instance instead of each carrying
+    a copy. Only the MAX_INTERNED_STYLES most recently used styles are kept; styles
+    are frozen, so sharing (or no longer sharing) one never changes a card.
+    """
+    shared_style = _INTERNED_STYLES.get(style)
+    if shared_style is not None:
+        _INTERNED_STYLES.move_to_end(style)
+        return shared_style
+
+    values = {}
+    for style_field in fields(Style):
+        value = getattr(style, style_field.name)
+        if isinstance(value, str):
+            value = sys.intern(value)
+        elif isinstance(value, tuple):
+            value = tuple(sys.intern(item) for item in value)
+        values[style_field.name] = value
+
+    shared_style = Style(**values)
+    _INTERNED_STYLES[shared_style] = shared_style
+    if len(_INTERNED_STYLES) > MAX_INTERNED_STYLES:
+        _INTERNED_STYLES.popitem(last=False)
+    return shared_style
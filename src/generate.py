@@ -1,13 +1,22 @@
 #!/usr/bin/env python
 
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import os
 import random
 import time
+from typing import Iterable
 
 from pokemon_content.pokemon_collection import PokemonCollection
 from pokemon_content.pokemon_elements import PokemonElements
 from content.style import Style
 from pokemon_content.pokemon_rarity import PokemonRarity
+from render_cards import iter_render_cards
+from src.content.collection_exporter import DEFAULT_OUTPUT_PATH
+from src.mechanics.card import Card
+from src.pokemon_content.pokemon_prompts import generate_card_name, get_image_prompt
+from src.util.gpt_call import gemini_client
 
 
 def main():
@@ -22,36 +31,240 @@ def main():
         help="What type of monster to generate (e.g. monkey, dragon, etc.).",
     )
 
+    argparser.add_argument(
+        "--non-destructive",
+        action="store_true",
+        help="Only replace the card files that changed, keeping existing art and renders.",
+    )
+
+    argparser.add_argument(
+        "-n",
+        "--count",
+        type=int,
+        default=None,
+        help="Stream this many cards through generation and export, one at a time.",
+    )
+
+    argparser.add_argument(
+        "--render",
+        action="store_true",
+        help="Render each card as soon as it's exported.",
+    )
+
+    argparser.add_argument(
+        "--shards",
+        type=int,
+        default=None,
+        help="With --count, split the cards into this many seed shards generated in parallel.",
+    )
+
+    argparser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed for the collection (random by default).",
+    )
+
+    argparser.add_argument(
+        "--name-batch-size",
+        type=int,
+        default=1,
+        help="With --count, name this many cards per Gemini request.",
+    )
+
+    argparser.add_argument(
+        "--requests-per-second",
+        type=float,
+        default=None,
+        help="With --count, start no more than this many Gemini requests per second.",
+    )
+
     args = argparser.parse_args()
+    if args.shards is not None and args.count is None:
+        argparser.error("--shards requires --count.")
+    if args.shards is not None and args.shards < 1:
+        argparser.error("--shards must be at least 1.")
+    if args.name_batch_size < 1:
+        argparser.error("--name-batch-size must be at least 1.")
+    if args.name_batch_size > 1 and args.count is None:
+        argparser.error("--name-batch-size requires --count.")
+    if args.requests_per_second is not None and args.count is None:
+        argparser.error("--requests-per-second requires --count.")
+    if args.requests_per_second is not None and args.requests_per_second <= 0:
+        argparser.error("--requests-per-second must be positive.")
     subject_override = args.subject
 
 
+    all_collections = [
+        create_classic_collection(),
+    ]
+
+    collection_seed = args.seed if args.seed is not None else random.randint(0, 1000000)
+    for current_collection in all_collections:
+        random.seed(collection_seed)
+
+        if args.count is not None and args.shards is not None:
+            generate_sharded_collection(
+                current_collection,
+                args.count,
+                args.shards,
+                collection_seed,
+                subject_override,
+                name_batch_size=args.name_batch_size,
+                requests_per_second=args.requests_per_second,
+            )
+            export_collection(current_collection, args)
+            print(f"Exported {len(current_collection.cards)} cards (seed {collection_seed}).")
+            continue
+
+        if args.count is not None:
+            stream_collection(current_collection, args, subject_override)
+            continue
+
+        monsters = current_collection.generate_random_cards(
+            element=PokemonElements.NEUTRAL, subject_override=subject_override
+        )
+        print(*monsters, sep="\n\n")
+        export_collection(current_collection, args)
+
+    if gemini_client().is_gemini_enabled:
+        gemini_client().log_metrics()
+
+
+def create_classic_collection() -> PokemonCollection:
     pokemon_style: Style = Style(
         subject_type="Moster",
         style_suffix="--niji",
     )
 
-    classic_collection = PokemonCollection(
+    return PokemonCollection(
         "pokemon-classic",
         theme_style=pokemon_style,
         elements=PokemonElements.NEUTRAL,
         rarities=PokemonRarity.ALL,
     )
 
-    all_collections = [
-        classic_collection,
-    ]
 
-    collection_seed = random.randint(0, 1000000)
-    for current_collection in all_collections:
-        random.seed(collection_seed)
+def generate_sharded_collection(
+    collection: PokemonCollection,
+    n: int,
+    n_shards: int,
+    seed: int,
+    subject_override: str = None,
+    name_batch_size: int = 1,
+    requests_per_second: float | None = None,
+):
+    """Generates n cards split over seed shards in parallel processes, merged into the collection.
 
-        monsters = current_collection.generate_random_cards(
-            element=PokemonElements.NEUTRAL, subject_override=subject_override
+    Each shard gets its own collection, a seed derived from `seed` and its own
+    cache scope, so the same seed and shard count always give the same cards,
+    whichever worker runs each shard. The request rate is split evenly over the shards.
+    """
+    seed_generator = random.Random(seed)
+    shard_seeds = [seed_generator.randrange(2**32) for _ in range(n_shards)]
+    shard_sizes = [n // n_shards + (1 if i < n % n_shards else 0) for i in range(n_shards)]
+    shard_requests_per_second = (
+        requests_per_second / n_shards if requests_per_second is not None else None
+    )
+
+    # Shards don't depend on which worker runs them, so the worker count can be capped.
+    with ProcessPoolExecutor(max_workers=min(n_shards, os.cpu_count() or 1)) as executor:
+        shard_cards = executor.map(
+            generate_shard,
+            range(n_shards),
+            shard_sizes,
+            shard_seeds,
+            repeat(subject_override),
+            repeat(name_batch_size),
+            repeat(shard_requests_per_second),
         )
-        print(*monsters, sep="\n\n")
-        current_collection.export()
+        # Re-requested names must not replay the shards' answers to the same prompts.
+        gemini_client().set_cache_scope("merge")
+        for cards in shard_cards:
+            merge_cards(collection, cards)
+
+
+def generate_shard(
+    shard_index: int,
+    n: int,
+    seed: int,
+    subject_override: str = None,
+    name_batch_size: int = 1,
+    requests_per_second: float | None = None,
+) -> list[Card]:
+    # Workers are reused across shards, so start the client's counts over.
+    gemini_client().reset_metrics()
+    gemini_client().set_cache_scope(f"shard {shard_index}")
+    random.seed(seed)
+    shard_collection = create_classic_collection()
+    cards = list(
+        shard_collection.iter_cards(
+            n,
+            element=PokemonElements.NEUTRAL,
+            subject_override=subject_override,
+            name_batch_size=name_batch_size,
+            requests_per_second=requests_per_second,
+        )
+    )
+    if gemini_client().is_gemini_enabled:
+        gemini_client().log_metrics()
+    return cards
+
+
+def merge_cards(collection: PokemonCollection, cards: list[Card]):
+    """Adds a shard's cards to the collection, re-indexing them and keeping names unique."""
+    for card in cards:
+        card.index = collection.next_card_index()
+
+        if card.name in collection.card_names_seen:
+            # Shards can't see each other's names, so ask for another one...
+            if gemini_client().is_gemini_enabled:
+                card.name = generate_card_name(card, collection.card_names_seen)
+
+            # ...and number the name if it's still taken.
+            base_name = card.name
+            suffix = 2
+            while card.name in collection.card_names_seen:
+                card.name = f"{base_name} {suffix}"
+                suffix += 1
+
+            card.image_prompt = get_image_prompt(card)
+
+        collection.card_names_seen.add(card.name)
+        collection.add_card(card)
+
+
+def stream_collection(collection: PokemonCollection, args, subject_override: str = None):
+    # Each card flows through export (and rendering) as soon as it's generated,
+    # and isn't kept around afterwards.
+    cards = collection.iter_cards(
+        args.count,
+        element=PokemonElements.NEUTRAL,
+        subject_override=subject_override,
+        keep_cards=False,
+        name_batch_size=args.name_batch_size,
+        requests_per_second=args.requests_per_second,
+    )
+    export_collection(collection, args, cards, print_cards=True)
+
+
+def export_collection(
+    collection: PokemonCollection,
+    args,
+    cards: Iterable[Card] | None = None,
+    print_cards: bool = False,
+):
+    """Exports the cards (all of the collection's by default), rendering each with --render."""
+    exported_cards = collection.iter_export(cards, non_destructive=args.non_destructive)
 
+    if args.render:
+        collection_path = f"{DEFAULT_OUTPUT_PATH}/{collection.collection_name}"
+        for render_path in iter_render_cards(exported_cards, collection_path):
+            print(f"Rendered {render_path}")
+    else:
+        for card in exported_cards:
+            if print_cards:
+                print(card)
 
 
 if __name__ == "__main__":
@@ -1,5 +1,4 @@
 from dataclasses import dataclass
-from functools import cached_property
 import math
 
 from src.mechanics.element import Element, NEUTRAL
@@ -7,7 +6,7 @@ from src.mechanics.element import Element, NEUTRAL
 CIRCLE_UNICODE = "●"
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class Ability:
 
     name: str
@@ -15,7 +14,7 @@ class Ability:
     cost: int = 1  #  Between 1 and 4
     is_mixed_element: bool = False  #  Whether the ability is part neutral.
 
-    @cached_property
+    @property
     def power(self):
         base_power = self.cost * 10
 
@@ -30,7 +29,7 @@ class Ability:
 
         return base_power + elemental_bonus_points
 
-    @cached_property
+    @property
     def elemental_cost(self) -> int:
         if self.element.is_neutral:
             # No elements are used.
@@ -42,7 +41,7 @@ class Ability:
             # All the cost is elemental.
             return self.cost
 
-    @cached_property
+    @property
     def ability_key(self):
         """Returns a key that can be used to identify the ability of the same stats"""
         mixed_modifier = "mixed" if self.is_mixed_element else "pure"
@@ -1,13 +1,13 @@
 from dataclasses import dataclass, field
-from functools import cached_property
 
 from src.content.style import Style
+from src.mechanics.element import NEUTRAL, Element
 from src.mechanics.rarity import Rarity
 
 STAR_UNICODE = "★ "
 
 
-@dataclass
+@dataclass(slots=True)
 class Card:
 
     index: int
@@ -17,6 +17,7 @@ class Card:
     atk: int
     res: int
     spd: int
+    element: Element = NEUTRAL
     part_of_evolution: bool = False
     style: Style = field(default_factory=Style)
 
@@ -31,6 +32,7 @@ class Card:
         message += f"RES: {self.res}\n"
         message += f"SPD: {self.spd}\n"
         message += f"Rarity: {rarity_stars} ({self.rarity.name})\n"
+        message += f"Element: {self.element.ascii_name()}\n"
 
         message += f"Image Prompt:\n"
         message += f"{self.image_prompt}\n\n"
@@ -42,6 +44,7 @@ class Card:
             "name": self.name,
             "rarity": self.rarity.name,
             "rarity_index": self.rarity.index,
+            "element": self.element.name,
             "hp": self.hp,
             "atk": self.atk,
             "res": self.res,
@@ -54,6 +57,6 @@ class Card:
     def image_file(self):
         return f"{self.index:03d}_{self.snake_case_name}.png"
 
-    @cached_property
+    @property
     def snake_case_name(self):
         return self.name.lower().replace(" ", "_")
@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import multiprocessing
+import queue
+import threading
+import time
+
+from generate import create_classic_collection
+from render_cards import save_card_render, warm_up_asset_cache
+from src.content.collection_exporter import DEFAULT_OUTPUT_PATH, CollectionExporter
+from src.pokemon_content.pokemon_collection import PokemonCollection
+from src.pokemon_content.pokemon_elements import PokemonElements
+from src.util.gpt_call import gemini_client
+from src.util.rate_limiter import RateLimiter
+
+# Put on a queue (once per downstream worker) when its producers are done.
+END_OF_STAGE = None
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    items: int = 0
+    busy_time: float = 0.0
+    start_time: float = 0.0
+    end_time: float = 0.0
+
+    # Depth of the queue feeding this stage, sampled every time a worker takes an item.
+    queue_depth_samples: int = 0
+    total_queue_depth: int = 0
+    max_queue_depth: int = 0
+
+    input_finished: bool = False
+    errors: list[Exception] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record_item(self, busy_time: float):
+        with self._lock:
+            self.items += 1
+            self.busy_time += busy_time
+
+    def sample_queue(self, input_queue: queue.Queue):
+        depth = input_queue.qsize()
+        with self._lock:
+            self.queue_depth_samples += 1
+            self.total_queue_depth += depth
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def summary(self) -> str:
+        wall_time = max(self.end_time - self.start_time, 1e-9)
+        throughput = self.items / wall_time
+        utilization = self.busy_time / (wall_time * self.workers)
+        mean_queue_depth = self.total_queue_depth / max(self.queue_depth_samples, 1)
+        return (
+            f"{self.name:<10} {self.workers:>2} workers  {self.items:>6} cards  "
+            f"{throughput:8.2f} cards/s  {utilization:6.1%} busy  "
+            f"input queue mean {mean_queue_depth:5.1f} / max {self.max_queue_depth}"
+        )
+
+
+def run_pipeline(
+    collection: PokemonCollection,
+    n: int,
+    subject_override: str = None,
+    generate_workers: int = 1,
+    render_workers: int = 1,
+    queue_size: int = 16,
+    non_destructive: bool = False,
+    name_batch_size: int = 1,
+    requests_per_second: float | None = None,
+) -> list[StageStats]:
+    """Generates, exports and renders n cards, with the stages running concurrently.
+
+    Stages are connected by bounded queues, so a slow stage holds back the ones
+    before it instead of letting cards pile up in memory.
+
+    Generation workers are concurrent Gemini name requests (card building itself is
+    sequential, so it stays reproducible for a seed), each naming name_batch_size
+    cards per request, and starting no more than requests_per_second requests each
+    second. The collection files have a
+    single writer, so export always uses one worker. Rendering uses one process per
+    worker.
+    """
+    export_queue = queue.Queue(maxsize=queue_size)
+    render_queue = queue.Queue(maxsize=queue_size)
+    collection_path = f"{DEFAULT_OUTPUT_PATH}/{collection.collection_name}"
+
+    generate_stats = StageStats("generate", generate_workers)
+    export_stats = StageStats("export", 1)
+    render_stats = StageStats("render", render_workers)
+
+    rate_limiter = RateLimiter(requests_per_second)
+
+    def generate_cards():
+        generate_stats.start_time = time.perf_counter()
+        try:
+            cards_per_batch = generate_workers * name_batch_size
+            for batch_start in range(0, n, cards_per_batch):
+                batch_size = min(cards_per_batch, n - batch_start)
+                start_time = time.perf_counter()
+                if cards_per_batch > 1 or requests_per_second is not None:
+                    cards = asyncio.run(
+                        collection.generate_cards_async(
+                            batch_size,
+                            element=PokemonElements.NEUTRAL,
+                            subject_override=subject_override,
+                            max_concurrency=generate_workers,
+                            rate_limiter=rate_limiter,
+                            name_batch_size=name_batch_size,
+                        )
+                    )
+                else:
+                    cards = collection.generate_card_series(
+                        PokemonElements.NEUTRAL, 1, subject_override
+                    )
+                batch_time = time.perf_counter() - start_time
+
+                for card in cards:
+                    generate_stats.record_item(batch_time / len(cards))
+                    export_queue.put(card)
+        except Exception as e:
+            generate_stats.errors.append(e)
+        finally:
+            export_queue.put(END_OF_STAGE)
+            generate_stats.end_time = time.perf_counter()
+
+    def export_cards():
+        export_stats.start_time = time.perf_counter()
+        try:
+            with CollectionExporter(
+                collection.collection_name, non_destructive=non_destructive
+            ) as exporter:
+                for card in iter_queue(export_queue, export_stats):
+                    start_time = time.perf_counter()
+                    exporter.write_card(card)
+                    export_stats.record_item(time.perf_counter() - start_time)
+                    render_queue.put(card)
+        except Exception as e:
+            export_stats.errors.append(e)
+            drain_queue(export_queue, export_stats)
+        finally:
+            for _ in range(render_workers):
+                render_queue.put(END_OF_STAGE)
+            export_stats.end_time = time.perf_counter()
+
+    def render_cards(executor: ProcessPoolExecutor):
+        for card in iter_queue(render_queue, render_stats):
+            start_time = time.perf_counter()
+            try:
+                executor.submit(save_card_render, card, collection_path).result()
+            except Exception as e:
+                render_stats.errors.append(e)
+                continue
+            render_stats.record_item(time.perf_counter() - start_time)
+
+    # Cards are only held while they move through the pipeline.
+    previous_keep_cards = collection.keep_cards
+    collection.keep_cards = False
+
+    # Worker processes are started from the stage threads, so spawn them rather than fork.
+    with ProcessPoolExecutor(
+        max_workers=render_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=warm_up_asset_cache,
+    ) as executor:
+        render_stats.start_time = time.perf_counter()
+        threads = [
+            threading.Thread(target=generate_cards),
+            threading.Thread(target=export_cards),
+            *[
+                threading.Thread(target=render_cards, args=(executor,))
+                for _ in range(render_workers)
+            ],
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        render_stats.end_time = time.perf_counter()
+
+    collection.keep_cards = previous_keep_cards
+    all_stats = [generate_stats, export_stats, render_stats]
+    for stats in all_stats:
+        if len(stats.errors) > 0:
+            raise stats.errors[0]
+    return all_stats
+
+
+def iter_queue(input_queue: queue.Queue, stats: StageStats):
+    while True:
+        stats.sample_queue(input_queue)
+        item = input_queue.get()
+        if item is END_OF_STAGE:
+            stats.input_finished = True
+            return
+        yield item
+
+
+def drain_queue(input_queue: queue.Queue, stats: StageStats):
+    # Keep taking items so the stage before this one is never blocked forever.
+    while not stats.input_finished:
+        stats.input_finished = input_queue.get() is END_OF_STAGE
+
+
+def main():
+    argparser = argparse.ArgumentParser()
+    argparser.add_argument(
+        "-n", "--count", type=int, default=10, help="Number of cards to produce."
+    )
+    argparser.add_argument(
+        "-s",
+        "--subject",
+        type=str,
+        default=None,
+        help="What type of monster to generate (e.g. monkey, dragon, etc.).",
+    )
+    argparser.add_argument(
+        "--generate-workers",
+        type=int,
+        default=1,
+        help="Number of card names to request from Gemini at the same time.",
+    )
+    argparser.add_argument(
+        "--name-batch-size",
+        type=int,
+        default=1,
+        help="Number of cards to name per Gemini request.",
+    )
+    argparser.add_argument(
+        "--requests-per-second",
+        type=float,
+        default=None,
+        help="Maximum number of Gemini requests to start per second (unlimited by default).",
+    )
+    argparser.add_argument(
+        "--render-workers",
+        type=int,
+        default=1,
+        help="Number of processes to render with.",
+    )
+    argparser.add_argument(
+        "--queue-size",
+        type=int,
+        default=16,
+        help="Maximum number of cards waiting between two stages.",
+    )
+    argparser.add_argument(
+        "--non-destructive",
+        action="store_true",
+        help="Only replace the card files that changed, keeping existing art and renders.",
+    )
+    args = argparser.parse_args()
+    if args.generate_workers < 1 or args.render_workers < 1:
+        argparser.error("--generate-workers and --render-workers must be at least 1.")
+    if args.name_batch_size < 1:
+        argparser.error("--name-batch-size must be at least 1.")
+    if args.requests_per_second is not None and args.requests_per_second <= 0:
+        argparser.error("--requests-per-second must be positive.")
+
+    collection = create_classic_collection()
+
+    start_time = time.perf_counter()
+    all_stats = run_pipeline(
+        collection,
+        args.count,
+        subject_override=args.subject,
+        generate_workers=args.generate_workers,
+        render_workers=args.render_workers,
+        queue_size=args.queue_size,
+        non_destructive=args.non_destructive,
+        name_batch_size=args.name_batch_size,
+        requests_per_second=args.requests_per_second,
+    )
+    total_time = time.perf_counter() - start_time
+
+    print(f"\nProduced {args.count} cards in {total_time:.2f}s:")
+    for stats in all_stats:
+        print(stats.summary())
+
+    if gemini_client().is_gemini_enabled:
+        gemini_client().log_metrics()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+from src.mechanics.card import Card
+from src.mechanics.element import NEUTRAL
+from src.pokemon_content.pokemon_elements import PokemonElements
+from src.pokemon_content.pokemon_rarity import PokemonRarity
+
+
+def card_from_json(data: dict) -> Card:
+    """Reads a card back from its exported JSON (see Card.to_json)."""
+    return Card(
+        index=data["index"],
+        name=data["name"],
+        rarity=PokemonRarity.get_rarity_by_name(data["rarity"]),
+        hp=data["hp"],
+        atk=data["atk"],
+        res=data["res"],
+        spd=data["spd"],
+        element=PokemonElements.get_element_by_name(data.get("element", NEUTRAL.name)),
+        image_prompt=data.get("image_prompt"),
+    )
@@ -1,16 +1,36 @@
+import asyncio
 from dataclasses import dataclass
 import random
+from typing import Iterator
+
+import numpy as np
 
 from src.content.collection import Collection
-from src.content.style import Style
+from src.content.style import Style, intern_style
 from src.mechanics.card import Card
 from src.mechanics.element import Element
 from src.mechanics.rarity import Rarity
 from src.pokemon_content.pokemon_content_pool import get_closest_match, get_creature_types, get_random_detail_adjective, \
     get_random_rarity_adjective, get_random_series_adjective, AMBIENCE_BY_ELEMENT, \
     get_random_ambience
-from src.pokemon_content.pokemon_prompts import get_image_prompt, get_visual_description, generate_card_name
+from src.pokemon_content.pokemon_prompts import get_image_prompt, get_visual_description, generate_card_name, \
+    generate_card_name_candidates_async, pick_card_name
 from src.util.gpt_call import gemini_client
+from src.util.rate_limiter import RateLimiter
+
+
+@dataclass
+class RolledStats:
+    """Stats for a batch of cards, one array per stat."""
+
+    rarity_index: np.ndarray
+    hp: np.ndarray
+    atk: np.ndarray
+    res: np.ndarray
+    spd: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.hp)
 
 
 @dataclass
@@ -21,6 +41,89 @@ class PokemonCollection(Collection):
     NEUTRAL_ELEMENT_CHANCE = 0.5
     MIXED_ELEMENT_CHANCE = 0.5
 
+    # Set while cards are being built ahead of a concurrent naming pass.
+    defer_card_names: bool = False
+
+    def iter_cards(
+        self,
+        n: int,
+        element: Element = None,
+        subject_override: str = None,
+        keep_cards: bool = True,
+        name_batch_size: int = 1,
+        requests_per_second: float | None = None,
+    ) -> Iterator[Card]:
+        """Yields n new cards as they're finished.
+
+        With a name_batch_size above 1, cards are named (concurrently) in batches of that
+        size, and each batch is yielded as soon as it's named. With requests_per_second,
+        no more than that many Gemini requests start each second.
+        """
+        if name_batch_size <= 1 and requests_per_second is None:
+            yield from super().iter_cards(n, element, subject_override, keep_cards)
+            return
+
+        rate_limiter = RateLimiter(requests_per_second)
+        name_batch_size = max(name_batch_size, 1)
+
+        previous_keep_cards = self.keep_cards
+        self.keep_cards = keep_cards
+        try:
+            for batch_start in range(0, n, name_batch_size):
+                batch_size = min(name_batch_size, n - batch_start)
+                yield from asyncio.run(
+                    self.generate_cards_async(
+                        batch_size,
+                        element,
+                        subject_override,
+                        rate_limiter=rate_limiter,
+                        name_batch_size=batch_size,
+                    )
+                )
+        finally:
+            self.keep_cards = previous_keep_cards
+
+    async def generate_cards_async(
+        self,
+        n: int,
+        element: Element = None,
+        subject_override: str = None,
+        max_concurrency: int = 8,
+        rate_limiter: RateLimiter | None = None,
+        name_batch_size: int = 1,
+    ) -> list[Card]:
+        """Builds n cards up front, then names them all with concurrent Gemini requests.
+
+        A name_batch_size above 1 names that many cards per request.
+        """
+        new_cards = []
+        self.defer_card_names = True
+        try:
+            for _ in range(n):
+                card_element = element if element else random.choice(self.elements)
+                new_cards.extend(
+                    self.generate_card_series(card_element, 1, subject_override)
+                )
+        finally:
+            self.defer_card_names = False
+
+        if gemini_client().is_gemini_enabled:
+            candidates = await generate_card_name_candidates_async(
+                new_cards, max_concurrency, rate_limiter, name_batch_size
+            )
+        else:
+            candidates = [{card.name} for card in new_cards]
+
+        # Resolve name collisions in card order once every response is in,
+        # so the result doesn't depend on which request finished first.
+        for card, potential_names in zip(new_cards, candidates):
+            card.name = pick_card_name(potential_names, self.card_names_seen)
+            card.image_prompt = get_image_prompt(card)
+            card.visual_description = get_visual_description(card)
+            self.card_names_seen.add(card.name)
+
+        return new_cards
+
     def generate_card(
         self,
         element: Element,
@@ -30,42 +133,32 @@ class PokemonCollection(Collection):
         subject_override: str = None,
     ) -> Card:
 
-        is_part_of_series = series_index is not None
-        if is_part_of_series:
-            max_ability_points = self.get_points_budget(rarity.index, series_index)
-        else:
-            max_ability_points = self.get_points_budget(rarity.index, 1)
-
-        hp_points = random.randint(0, max_ability_points // 2)
-
-
-        # Calculate HP
-        bonus_hp_points = max_ability_points + (hp_points * self.ABILITY_TO_HP_PTS)
-
-        hp = random.randint(1,10) * bonus_hp_points
-
-        atk = random.randint(4,10)
-        res = random.randint(1,8)
-        spd = random.randint(1,10)
+        hp, atk, res, spd = self.roll_stats(rarity.index, series_index)
 
         style = self.generate_style(
             inherited_style, element, rarity, series_index, subject_override
         )
 
         card = Card(
-            index=len(self.cards) + 1,
+            index=self.next_card_index(),
             name="Untitled Card",
             rarity=rarity,
             hp=hp,
             atk=atk,
             res=res,
             spd=spd,
+            element=element,
             style=style,
         )
 
         card.image_prompt = get_image_prompt(card)
         card.visual_description = get_visual_description(card)
 
+        if self.defer_card_names:
+            # The name (and the prompts that use it) are filled in by generate_cards_async.
+            self.add_card(card)
+            return card
+
         # Generate a name for the card.
         if gemini_client().is_gemini_enabled:
             card.name = generate_card_name(card, self.card_names_seen)
@@ -73,7 +166,7 @@ class PokemonCollection(Collection):
         card.image_prompt = get_image_prompt(card)
         card.visual_description = get_visual_description(card)
         self.card_names_seen.add(card.name)
-        self.cards.append(card)
+        self.add_card(card)
         return card
 
     def generate_style(
@@ -85,42 +178,45 @@ class PokemonCollection(Collection):
         subject_override: str = None,
     ) -> Style:
 
-        style = Style(
+        # Styles are frozen, so the fields are gathered first.
+        style_values = dict(
+            subject_type=self.theme_style.subject_type,
             style_prefix=self.theme_style.style_prefix,
             style_suffix=self.theme_style.style_suffix,
         )
 
-        style.subject_type = self.theme_style.subject_type
-
         # Pick the card's subject (creature type)
         if inherited_style is not None:
-            style.subject = inherited_style.subject
-            style.subject_adjectives = inherited_style.subject_adjectives
-            style.detail = inherited_style.detail
-            style.environment = inherited_style.environment
+            style_values["subject"] = inherited_style.subject
+            style_values["subject_adjectives"] = inherited_style.subject_adjectives
+            style_values["detail"] = inherited_style.detail
+            style_values["environment"] = inherited_style.environment
         else:
 
             if subject_override is not None:
                 subject = get_closest_match(subject_override)
-                style.subject = subject.name
+                style_values["subject"] = subject.name
             else:
                 potential_subjects = get_creature_types(element)
                 reduced_subjects: set = potential_subjects - self.subjects_seen
                 if len(reduced_subjects) == 0:
                     reduced_subjects = potential_subjects
 
-                subject = random.choice(list(reduced_subjects))
+                # Sort first: set order changes between processes, which would break seeding.
+                subject = random.choice(sorted(reduced_subjects, key=lambda x: x.name))
                 self.subjects_seen.add(subject)
-                style.subject = subject.name
+                style_values["subject"] = subject.name
 
             potential_details = set(subject.details)
             reduced_details: set = potential_details - self.subjects_seen
             if len(reduced_details) == 0:
                 reduced_details = potential_details
 
-            detail = random.choice(list(reduced_details))
-            detail_adjective = get_random_detail_adjective(element=element)
-            style.detail = detail.text(detail_adjective)
+            # Some creatures (e.g. spiders) have no details to pick from.
+            if len(reduced_details) > 0:
+                detail = random.choice(sorted(reduced_details, key=lambda x: x.text()))
+                detail_adjective = get_random_detail_adjective(element=element)
+                style_values["detail"] = detail.text(detail_adjective)
 
         # Pick adjective(s) for the subject.
         rarity_prefix = get_random_rarity_adjective(rarity.index)
@@ -133,19 +229,91 @@ class PokemonCollection(Collection):
         else:
             size_prefix = rarity_prefix
 
-        style.subject_adjectives = [
+        style_values["subject_adjectives"] = (
             *self.theme_style.subject_adjectives,
             size_prefix,
-        ]
+        )
 
         # Set the ambience
         if rarity.index >= 2 and series_index == 2:
             # Use the last background for the final card in the series.
-            style.ambience = AMBIENCE_BY_ELEMENT.get(element)[-1]
+            style_values["ambience"] = AMBIENCE_BY_ELEMENT.get(element)[-1]
+        else:
+            style_values["ambience"] = get_random_ambience(element) + " background"
+
+        # Cards with the same look share one Style instance.
+        return intern_style(Style(**style_values))
+
+    @classmethod
+    def roll_stats(
+        cls, rarity_index: int, series_index: int | None = None, rng: random.Random = random
+    ) -> tuple[int, int, int, int]:
+        """Rolls a card's HP, ATK, RES and SPD."""
+        is_part_of_series = series_index is not None
+        if is_part_of_series:
+            max_ability_points = cls.get_points_budget(rarity_index, series_index)
+        else:
+            max_ability_points = cls.get_points_budget(rarity_index, 1)
+
+        hp_points = rng.randint(0, max_ability_points // 2)
+
+
+        # Calculate HP
+        bonus_hp_points = max_ability_points + (hp_points * cls.ABILITY_TO_HP_PTS)
+
+        hp = rng.randint(1,10) * bonus_hp_points
+
+        atk = rng.randint(4,10)
+        res = rng.randint(1,8)
+        spd = rng.randint(1,10)
+        return hp, atk, res, spd
+
+    @classmethod
+    def roll_stats_batch(
+        cls,
+        rarity_indices: int | np.ndarray,
+        n: int | None = None,
+        series_index: int | None = None,
+        seed: int | None = None,
+        seed_compatible: bool = False,
+    ) -> RolledStats:
+        """Rolls the stats of many cards at once, with the same rules as roll_stats.
+
+        `rarity_indices` is either one rarity for all n cards, or one rarity per card.
+        Stats are drawn from a NumPy Generator seeded with `seed`. With
+        seed_compatible=True they're drawn from `random.Random(seed)` instead, in the
+        same order as roll_stats, so they match calling roll_stats card by card.
+        """
+        if np.ndim(rarity_indices) == 0:
+            rarity_indices = np.full(n, rarity_indices, dtype=np.int32)
         else:
-            style.ambience = get_random_ambience(element) + " background"
+            rarity_indices = np.asarray(rarity_indices, dtype=np.int32)
+        n = len(rarity_indices)
+
+        if seed_compatible:
+            rng = random.Random(seed)
+            stats = [cls.roll_stats(int(rarity), series_index, rng) for rarity in rarity_indices]
+            hp, atk, res, spd = np.array(stats, dtype=np.int32).reshape(n, 4).T
+            return RolledStats(rarity_indices, hp, atk, res, spd)
 
-        return style
+        rng = np.random.default_rng(seed)
+        max_ability_points = cls.get_points_budget(
+            rarity_indices, series_index if series_index is not None else 1
+        )
+        hp_points = rng.integers(0, max_ability_points // 2, endpoint=True)
+        bonus_hp_points = max_ability_points + (hp_points * cls.ABILITY_TO_HP_PTS)
+
+        hp = rng.integers(1, 10, size=n, endpoint=True) * bonus_hp_points
+        atk = rng.integers(4, 10, size=n, endpoint=True)
+        res = rng.integers(1, 8, size=n, endpoint=True)
+        spd = rng.integers(1, 10, size=n, endpoint=True)
+        return RolledStats(
+            rarity_indices,
+            hp.astype(np.int32),
+            atk.astype(np.int32),
+            res.astype(np.int32),
+            spd.astype(np.int32),
+        )
 
     @staticmethod
     def get_points_budget(rarity_index: int, series_index: int) -> int:
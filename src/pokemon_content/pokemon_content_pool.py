@@ -183,13 +183,13 @@ def get_series_adjectives_set(series_index: int) -> set[str]:
 
 
 def get_random_rarity_adjective(rarity_index: int) -> str:
-    return random.choice(list(get_rarity_adjectives_set(rarity_index)))
+    return random.choice(sorted(get_rarity_adjectives_set(rarity_index)))
 
 
 def get_random_series_adjective(series_index: int | None) -> str:
     if series_index is None:
         return ""
-    return random.choice(list(get_series_adjectives_set(series_index)))
+    return random.choice(sorted(get_series_adjectives_set(series_index)))
 
 
 def get_creature_types(element: Element) -> set[CreatuteType]:
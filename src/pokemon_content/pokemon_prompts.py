@@ -1,7 +1,11 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
 import string
 
 from src.mechanics.card import Card
 from src.util.gpt_call import gemini_client
+from src.util.rate_limiter import RateLimiter
 
 
 def get_visual_description(card: Card) -> str:
@@ -59,6 +63,66 @@ def generate_card_name(card: Card, seen_names: set[str]) -> str:
     if not gemini_client().is_gemini_enabled:
         return "Untitled Card"
 
+    prompt = get_card_name_prompt(card)
+    print(prompt)
+    response = gemini_client().get_completion(prompt)
+    return pick_card_name(parse_card_name_candidates(response), seen_names)
+
+
+async def generate_card_name_candidates_async(
+    cards: list[Card],
+    max_concurrency: int = 8,
+    rate_limiter: RateLimiter | None = None,
+    batch_size: int = 1,
+) -> list[set[str]]:
+    """Requests name candidates for all the cards concurrently, returned in card order.
+
+    With a batch_size above 1, each request names a whole batch of cards at once.
+    Pass the same rate_limiter to successive calls to limit their requests together.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    rate_limiter = rate_limiter or RateLimiter()
+    # One thread per concurrent request, so max_concurrency requests really are in flight.
+    executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    async def request_candidates(card: Card) -> set[str]:
+        async with semaphore:
+            await rate_limiter.wait()
+            response = await gemini_client().get_completion_async(
+                get_card_name_prompt(card), executor
+            )
+            return parse_card_name_candidates(response)
+
+    async def request_batch_candidates(batch: list[Card]) -> list[set[str]]:
+        if len(batch) == 1:
+            return [await request_candidates(batch[0])]
+
+        async with semaphore:
+            await rate_limiter.wait()
+            response = await gemini_client().get_completion_async(
+                get_card_names_batch_prompt(batch), executor
+            )
+        candidates = parse_card_names_batch(response.text, len(batch))
+
+        # Fall back to one (concurrent) request per card the response didn't cover.
+        missing = [i for i in range(len(batch)) if len(candidates[i]) == 0]
+        fallback_candidates = await asyncio.gather(
+            *[request_candidates(batch[i]) for i in missing]
+        )
+        for i, card_candidates in zip(missing, fallback_candidates):
+            candidates[i] = card_candidates
+        return candidates
+
+    batch_size = max(batch_size, 1)
+    batches = [cards[i : i + batch_size] for i in range(0, len(cards), batch_size)]
+    with executor:
+        batch_candidates = await asyncio.gather(
+            *[request_batch_candidates(batch) for batch in batches]
+        )
+    return [candidates for batch in batch_candidates for candidates in batch]
+
+
+def get_card_name_prompt(card: Card) -> str:
     # Generate a name for the card.
     # additional_modifier = "(max 2 words), "
     if card.rarity.index == 0:
@@ -68,31 +132,72 @@ def generate_card_name(card: Card, seen_names: set[str]) -> str:
 
     prompt = f"Generate a unique, orignal, creative,{additional_modifier} {card.style.subject_type} name for a {get_visual_description(card)}"
     prompt += f" (without using the word {card.style.subject_type.lower()} or neutral):\n"
-    print(prompt)
-    response = gemini_client().get_completion(prompt)
-
+    return prompt
+
+
+def get_card_names_batch_prompt(cards: list[Card], names_per_card: int = 3) -> str:
+    subject_type = cards[0].style.subject_type
+    prompt = f"Generate {names_per_card} unique, orignal, creative, single-word {subject_type} names "
+    prompt += f"for each of these {len(cards)} {subject_type}s "
+    prompt += f"(without using the word {subject_type.lower()} or neutral).\n"
+    prompt += "Respond only with a JSON object that maps each number to a list of names, "
+    prompt += 'e.g. {"1": ["Name", "Name"], "2": ["Name", "Name"]}.\n'
+    for i, card in enumerate(cards):
+        short_modifier = " (short names)" if card.rarity.index == 0 else ""
+        prompt += f"{i + 1}. A {get_visual_description(card)}{short_modifier}\n"
+    return prompt
+
+
+def parse_card_names_batch(response_text: str, n_cards: int) -> list[set[str]]:
+    """Maps a JSON batch response back to each card; cards it can't parse get no candidates."""
+    candidates = [set() for _ in range(n_cards)]
+
+    # Models often wrap JSON in a markdown code block.
+    json_start = response_text.find("{")
+    json_end = response_text.rfind("}")
+    try:
+        names_by_number = json.loads(response_text[json_start : json_end + 1])
+    except ValueError:
+        return candidates
+
+    if not isinstance(names_by_number, dict):
+        return candidates
+
+    for number, names in names_by_number.items():
+        if not str(number).isdigit() or not isinstance(names, list):
+            continue
+        card_index = int(number) - 1
+        if 0 <= card_index < n_cards:
+            cleaned_names = {clean_card_name(str(name)) for name in names}
+            candidates[card_index] = {name for name in cleaned_names if name}
+    return candidates
+
+
+def parse_card_name_candidates(response) -> set[str]:
     potential_names = set()
-    print(potential_names)
     for potential_name in response:
-        print(potential_name)
         try :
-            name = potential_name.text
-            print(name)
-            name = name.strip()
-            name = "".join([c for c in name if c.isalpha() or c == " " or c == "-"])
-            name = string.capwords(name)
+            name = clean_card_name(potential_name.text)
             potential_names.add(name)
-            print(name)
         except Exception as e:
             name = "Error"
             potential_names.add(name)
+    return potential_names
+
+
+def clean_card_name(name: str) -> str:
+    name = name.strip()
+    name = "".join([c for c in name if c.isalpha() or c == " " or c == "-"])
+    return string.capwords(name)
 
 
+def pick_card_name(potential_names: set[str], seen_names: set[str]) -> str:
     # Pick the shortest name.
     filtered_names = set(potential_names) - seen_names
     if len(filtered_names) > 0:
         potential_names = filtered_names
 
-    potential_names = sorted(potential_names, key=lambda x: len(x))
+    # Sort by name as well, so ties are always broken the same way.
+    potential_names = sorted(potential_names, key=lambda x: (len(x), x))
     name = potential_names[0]
     return name
@@ -1,16 +1,42 @@
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import json
 import os
 import pathlib
-from PIL import Image, ImageFont, ImageDraw
+from typing import Iterable, Iterator
+from PIL import Image
 
-from pokemon_content.pokemon_rarity import PokemonRarity
+from src.content.binary_collection import BinaryCollection, get_binary_collection_path
 from src.mechanics.ability import Ability
 from src.mechanics.card import Card
+from src.mechanics.element import NEUTRAL, Element
+from src.pokemon_content.pokemon_card_json import card_from_json
+from src.rendering.asset_cache import asset_cache
+from src.rendering.card_layout import CardLayout, TextField
+from src.rendering.render_manifest import RENDER_MANIFEST_NAME, RenderManifest, hash_files
+from src.rendering.render_profiler import (
+    RENDER_PROFILE_NAME,
+    configure_render_profiler,
+    render_profiler,
+    run_profiled,
+)
+from src.rendering.render_pyramid import (
+    DEFAULT_IMAGE_FORMAT,
+    DEFAULT_RENDER_OUTPUT,
+    IMAGE_FORMATS,
+    RenderOutput,
+    parse_levels,
+    save_pyramid,
+)
+from src.rendering.resource_registry import FONTS_PATH, resource_registry
+from src.rendering.sprite_atlas import DEFAULT_MAX_SHEET_SIZE, SpriteAtlasWriter
+from src.rendering.text_cache import text_run_cache
 
 MONSTER_IMAGE_SCALE = 0.255
 MONSTER_IMAGE_SCALE_SQ = 0.355
 IDEAL_CARD_WIDTH = 450
+ART_CENTER_Y = 330
 
 ABILITY_WIDTH = 370
 ABILITY_HEIGHT = 72
@@ -24,153 +50,342 @@ STATUS_Y_POSITION = 568
 STATUS_X_GAP = 82
 STATUS_SIZE = 20
 
-
-def render_cards(collection_path: str):
+CARD_TEMPLATE_NAME = "neutral_card.png"
+CARD_SIZE = (620, 892)
+ELEMENT_ART_CENTER_Y = 290  # On the element templates once fitted to CARD_SIZE.
+ELEMENT_ART_WIDTH = 470
+TITLE_FONT_PATH = f"{FONTS_PATH}/Cabin-Bold.ttf"
+TITLE_FONT_SIZE = 45
+STAT_FONT_PATH = f"{FONTS_PATH}/Cabin-Bold.ttf"
+STAT_FONT_SIZE = 28
+SYMBOL_FONT_PATH = f"{FONTS_PATH}/NotoSansSymbols2-Regular.ttf"
+
+RARITY_SYMBOLS = ["⬤", "◆", "★"]
+RARITY_SYMBOL_SIZES = [10, 14, 22]
+
+
+def render_cards(
+    collection_path: str,
+    workers: int = 1,
+    incremental: bool = False,
+    output: RenderOutput = DEFAULT_RENDER_OUTPUT,
+):
     card_path = pathlib.Path(collection_path, "cards")
     card_render_path = pathlib.Path(collection_path, "renders")
     os.makedirs(card_render_path, exist_ok=True)
 
-    for card_path in card_path.iterdir():
-        # Only render .json files.
-        if not card_path.suffix == ".json":
-            continue
+    # Only render .json files, sorted so the output order is always the same.
+    card_paths = sorted(path for path in card_path.iterdir() if path.suffix == ".json")
+
+    manifest = None
+    card_hashes = {}
+    if incremental:
+        manifest = RenderManifest.load(card_render_path / RENDER_MANIFEST_NAME)
+        manifest.prune({path.name for path in card_paths})
+        # Changing the resolutions or encoding invalidates every render too.
+        assets_hash = hash_files(get_render_asset_paths(), salt=output.describe())
+
+        outdated_card_paths = []
+        for path in card_paths:
+            with open(path) as f:
+                card = card_from_json(json.load(f))
+
+            card_art_path = pathlib.Path(collection_path, "images", card.image_file)
+            card_hashes[path.name] = hash_files([path, card_art_path], salt=assets_hash)
+            render_paths = get_render_paths(card, collection_path, output)
+            if manifest.needs_render(path.name, card_hashes[path.name], render_paths):
+                outdated_card_paths.append(path)
+        card_paths = outdated_card_paths
+
+    if workers > 1 and len(card_paths) > 1:
+        # Each worker process loads the templates and fonts once, up front.
+        chunk_size = max(1, len(card_paths) // (workers * 4))
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=warm_up_asset_cache
+        ) as executor:
+            rendered_paths = list(
+                map_renders(
+                    executor,
+                    render_card_file,
+                    card_paths,
+                    repeat(collection_path),
+                    repeat(output),
+                    chunksize=chunk_size,
+                )
+            )
+        print(f"Rendered {len(rendered_paths)} cards with {workers} workers.")
+    else:
+        for path in card_paths:
+            render_card_file(path, collection_path, output)
+        asset_cache().log_stats()
+        text_run_cache().log_stats()
+
+    if manifest is not None:
+        for path in card_paths:
+            manifest.mark_rendered(path.name, card_hashes[path.name])
+        manifest.save()
+        manifest.log_summary()
+
+
+def render_binary_cards(
+    collection_path: str, workers: int = 1, output: RenderOutput = DEFAULT_RENDER_OUTPUT
+):
+    """Renders every card of the collection's binary file (see content/binary_collection.py)."""
+    binary_path = get_binary_collection_path(collection_path)
+    os.makedirs(pathlib.Path(collection_path, "renders"), exist_ok=True)
+    with BinaryCollection(binary_path) as collection:
+        n_cards = len(collection)
+        if workers <= 1 or n_cards <= 1:
+            for card in collection:
+                save_card_render(card, collection_path, output)
+            asset_cache().log_stats()
+            return
+
+    # Each task maps the file for one chunk of cards, so no mapping outlives its task.
+    chunk_size = max(1, n_cards // (workers * 4))
+    chunks = [
+        range(start, min(start + chunk_size, n_cards)) for start in range(0, n_cards, chunk_size)
+    ]
+    with ProcessPoolExecutor(max_workers=workers, initializer=warm_up_asset_cache) as executor:
+        rendered_chunks = list(
+            map_renders(
+                executor,
+                render_binary_card_chunk,
+                chunks,
+                repeat(binary_path),
+                repeat(collection_path),
+                repeat(output),
+            )
+        )
+    n_rendered = sum(len(rendered_paths) for rendered_paths in rendered_chunks)
+    print(f"Rendered {n_rendered} cards with {workers} workers.")
+
+
+def render_card_atlas(
+    collection_path: str,
+    workers: int = 1,
+    thumbnail_width: int | None = None,
+    max_sheet_size: int = DEFAULT_MAX_SHEET_SIZE,
+):
+    """Renders every card straight into sprite sheets (see rendering/sprite_atlas.py)."""
+    card_path = pathlib.Path(collection_path, "cards")
+    card_paths = sorted(path for path in card_path.iterdir() if path.suffix == ".json")
+
+    with SpriteAtlasWriter(
+        collection_path, thumbnail_width=thumbnail_width, max_sheet_size=max_sheet_size
+    ) as atlas:
+        if workers > 1 and len(card_paths) > 1:
+            # Render a bounded batch at a time, so finished images don't pile up
+            # faster than they can be packed.
+            batch_size = workers * 8
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=warm_up_asset_cache
+            ) as executor:
+                for batch_start in range(0, len(card_paths), batch_size):
+                    batch = card_paths[batch_start : batch_start + batch_size]
+                    for render_name, card_image in map_renders(
+                        executor, render_card_file_image, batch, repeat(collection_path)
+                    ):
+                        atlas.add_card(render_name, card_image)
+        else:
+            for path in card_paths:
+                atlas.add_card(*render_card_file_image(path, collection_path))
+            asset_cache().log_stats()
+
+
+def render_card_file_image(
+    card_path: pathlib.Path, collection_path: str
+) -> tuple[str, Image.Image]:
+    """Renders a single card JSON file, returning its render name and image."""
+    with open(card_path) as f:
+        card = card_from_json(json.load(f))
+    return get_render_name(card), render_card(card, collection_path)
+
+
+def map_renders(executor: ProcessPoolExecutor, function, *iterables, chunksize: int = 1):
+    """Like executor.map, but also collects the workers' phase timings when profiling."""
+    if not render_profiler().enabled:
+        return executor.map(function, *iterables, chunksize=chunksize)
+
+    results = []
+    for result, timings in executor.map(
+        run_profiled, repeat(function), *iterables, chunksize=chunksize
+    ):
+        render_profiler().merge(timings)
+        results.append(result)
+    return results
+
+
+def render_binary_card_chunk(
+    positions: range,
+    binary_path: pathlib.Path,
+    collection_path: str,
+    output: RenderOutput = DEFAULT_RENDER_OUTPUT,
+) -> list[pathlib.Path]:
+    """Renders the cards at the given positions of a binary collection."""
+    with BinaryCollection(binary_path) as collection:
+        return [
+            save_card_render(collection.card(position), collection_path, output)
+            for position in positions
+        ]
+
+
+def render_card_file(
+    card_path: pathlib.Path,
+    collection_path: str,
+    output: RenderOutput = DEFAULT_RENDER_OUTPUT,
+) -> pathlib.Path:
+    """Renders a single card JSON file and saves it to the collection's renders folder."""
+    with open(card_path) as f:
+        data = json.load(f)
+
+    return save_card_render(card_from_json(data), collection_path, output)
+
+
+def save_card_render(
+    card: Card, collection_path: str, output: RenderOutput = DEFAULT_RENDER_OUTPUT
+) -> pathlib.Path:
+    """Saves every resolution of the card's render, returning the path of the largest."""
+    card_image = render_card(card, collection_path)
+    renders_path = pathlib.Path(collection_path, "renders")
+    with render_profiler().phase("encode"):
+        return save_pyramid(card_image, renders_path, get_render_stem(card), output)[0]
+
+
+def iter_render_cards(cards: Iterable[Card], collection_path: str) -> Iterator[pathlib.Path]:
+    """Renders cards as they arrive (e.g. from Collection.iter_export), yielding each saved path."""
+    os.makedirs(pathlib.Path(collection_path, "renders"), exist_ok=True)
+    for card in cards:
+        yield save_card_render(card, collection_path)
+
+
+def get_render_stem(card: Card) -> str:
+    return f"{card.index:03d}_{card.snake_case_name}"
+
+
+def get_render_name(card: Card) -> str:
+    return f"{get_render_stem(card)}.png"
+
+
+def get_render_paths(
+    card: Card, collection_path: str, output: RenderOutput = DEFAULT_RENDER_OUTPUT
+) -> list[pathlib.Path]:
+    """Returns where each resolution of the card's render is saved."""
+    renders_path = pathlib.Path(collection_path, "renders")
+    stem = get_render_stem(card)
+    return [output.level_path(renders_path, level, stem) for level in output.levels]
+
+
+def get_render_asset_paths() -> list[str]:
+    """Returns every shared asset a render depends on, so changing one invalidates all cards."""
+    font_paths = sorted({TITLE_FONT_PATH, STAT_FONT_PATH, SYMBOL_FONT_PATH})
+    return [*resource_registry().card_template_paths(), *font_paths]
+
+
+def warm_up_asset_cache():
+    get_card_layout(NEUTRAL)
+    asset_cache().warm_up(
+        fonts=[
+            (TITLE_FONT_PATH, TITLE_FONT_SIZE),
+            (STAT_FONT_PATH, STAT_FONT_SIZE),
+            *[(SYMBOL_FONT_PATH, size) for size in RARITY_SYMBOL_SIZES],
+        ],
+    )
 
-        with open(card_path) as f:
-            data = json.load(f)
-            card = card_from_json(data)
-            card_image = render_card(card, collection_path)
-            image_name = f"{card.index:03d}_{card.snake_case_name}.png"
-            card_image.save(card_render_path / f"{image_name}")
+
+# Compiled layouts of the card templates loaded by this process, by template path.
+_CARD_LAYOUTS: dict[pathlib.Path, CardLayout] = {}
+
+
+def get_card_layout(element: Element = NEUTRAL) -> CardLayout:
+    template_path = resource_registry().card_template_path(element)
+    layout = _CARD_LAYOUTS.get(template_path)
+    if layout is None:
+        template = resource_registry().card_template(element)
+        art_center_y, art_width = ART_CENTER_Y, IDEAL_CARD_WIDTH
+        if template_path.name != CARD_TEMPLATE_NAME:
+            # The element templates are smaller, so scale them up to the neutral card's
+            # size: every card then has the same size and text positions.
+            template = fit_template(template, CARD_SIZE)
+            art_center_y, art_width = ELEMENT_ART_CENTER_Y, ELEMENT_ART_WIDTH
+
+        stat_font = asset_cache().get_font(STAT_FONT_PATH, STAT_FONT_SIZE)
+        text_fields = {
+            "name": TextField(
+                (160, 85), asset_cache().get_font(TITLE_FONT_PATH, TITLE_FONT_SIZE), "ls"
+            ),
+            "hp": TextField((180, 555), stat_font, "rs"),
+            "atk": TextField((165, 615), stat_font, "rs"),
+            "res": TextField((165, 665), stat_font, "rs"),
+            "spd": TextField((180, 713), stat_font, "rs"),
+        }
+        # Each rarity's symbol has its own size, so it gets its own field.
+        for index, size in enumerate(RARITY_SYMBOL_SIZES):
+            text_fields[f"rarity_{index}"] = TextField(
+                (template.width - 64, 605), asset_cache().get_font(SYMBOL_FONT_PATH, size), "mm"
+            )
+
+        layout = CardLayout.compile(
+            template,
+            art_center=(template.width / 2, art_center_y),
+            art_width=art_width,
+            text_fields=text_fields,
+        )
+        _CARD_LAYOUTS[template_path] = layout
+    return layout
+
+
+def fit_template(template: Image.Image, size: tuple[int, int]) -> Image.Image:
+    """Scales the template to fit `size` without distorting it, centered on transparency."""
+    scale = min(size[0] / template.width, size[1] / template.height)
+    resized_size = (round(template.width * scale), round(template.height * scale))
+    resized = template.resize(resized_size, Image.Resampling.LANCZOS)
+
+    fitted = Image.new("RGBA", size, (0, 0, 0, 0))
+    fitted.paste(
+        resized, ((size[0] - resized_size[0]) // 2, (size[1] - resized_size[1]) // 2)
+    )
+    return fitted
 
 
 def render_card(card: Card, collection_path: str):
     print(f"Rendering {card.name}")
-    card_template_name = f"neutral_card.png"
-    card_image = Image.open(f"../resources/cards/{card_template_name}")
+    profiler = render_profiler()
+    with profiler.phase("template"):
+        layout = get_card_layout(card.element)
 
     card_art_path = pathlib.Path(collection_path, "images", card.image_file)
 
     if pathlib.Path(card_art_path).exists():
-        canvas = Image.new("RGBA", card_image.size, (0, 0, 0, 0))
-        card_art_image = Image.open(card_art_path)
-
-        # Rescale the image to fit the card.
-        rescale_factor = IDEAL_CARD_WIDTH / card_art_image.size[0]
-        resized_image_shape = (
-            int(card_art_image.size[0] * rescale_factor),
-            int(card_art_image.size[1] * rescale_factor),
-        )
-        card_art_image = card_art_image.resize(resized_image_shape)
-
-        # Center the image.
-        card_center_x = card_image.size[0] / 2
-        card_center_y = 330
-        monster_image_x = card_center_x - (card_art_image.size[0] / 2)
-        monster_image_y = card_center_y - (card_art_image.size[1] / 2)
-        canvas.paste(card_art_image, (int(monster_image_x), int(monster_image_y)))
-        canvas.paste(card_image, (0, 0), card_image)
-        card_image = canvas
+        with Image.open(card_art_path) as card_art_image:
+            with profiler.phase("art_decode"):
+                card_art_image.load()
+            with profiler.phase("art_resize"):
+                resized_art = layout.resize_art(card_art_image)
+        with profiler.phase("composite"):
+            card_image = layout.composite(resized_art)
     else:
         # Print in yellow ASCII.
         print(f"\033[93m [WARN] {card_art_path} not found.\033[0m")
-
-    # Write the name of the card.
-    name_text_position = (160, 85)
-    title_font = ImageFont.truetype("../resources/font/Cabin-Bold.ttf", 45)
-    name_text = card.name
-
-    # Draw the name text onto the card.
-    draw = ImageDraw.Draw(card_image)
-    draw.text(
-        name_text_position, name_text, font=title_font, fill=(0, 0, 0), anchor="ls"
-    )
-
-    # Draw the HP on the card.
-    hp_position = (180, 555)
-    hp_font = ImageFont.truetype("../resources/font/Cabin-Bold.ttf", 28)
-    hp_text = f"{card.hp} PV"
-    draw.text(
-        hp_position,
-        hp_text,
-        font=hp_font,
-        fill=(0, 0, 0),
-        anchor="rs",
-    )
-
-    # Draw the ATK on the card.
-    atk_position = (165, 615)
-    atk_font = ImageFont.truetype("../resources/font/Cabin-Bold.ttf", 28)
-    atk_text = f"{card.atk} ATK"
-    draw.text(
-        atk_position,
-        atk_text,
-        font=atk_font,
-        fill=(0, 0, 0),
-        anchor="rs",
-    )
-
-    # Draw the RES on the card.
-    res_position = (165, 665)
-    res_font = ImageFont.truetype("../resources/font/Cabin-Bold.ttf", 28)
-    res_text = f"{card.res} RES"
-    draw.text(
-        res_position,
-        res_text,
-        font=res_font,
-        fill=(0, 0, 0),
-        anchor="rs",
-    )
-
-    # Draw the SPD on the card.
-    spd_position = (180, 713)
-    spd_font = ImageFont.truetype("../resources/font/Cabin-Bold.ttf", 28)
-    spd_text = f"{card.spd} SPD"
-    draw.text(
-        spd_position,
-        spd_text,
-        font=spd_font,
-        fill=(0, 0, 0),
-        anchor="rs",
-    )
-
-    # Write the rarity of the Pokémon.
-    rarity_symbol_position = (card_image.width - 64, 605)
-    symbol_font = ImageFont.truetype("../resources/font/NotoSansSymbols2-Regular.ttf", 22)
-    rarity_symbols = ["⬤", "◆", "★"]
-    rarity_symbol_sizes = [10, 14, 22]
-
-    symbol_text = rarity_symbols[card.rarity.index]
-    symbol_font = ImageFont.truetype(
-        "../resources/font/NotoSansSymbols2-Regular.ttf",
-        rarity_symbol_sizes[card.rarity.index],
-    )
-
-    draw.text(
-        rarity_symbol_position,
-        symbol_text,
-        font=symbol_font,
-        fill=(0, 0, 0),
-        anchor="mm",
-    )
+        with profiler.phase("composite"):
+            card_image = layout.compose(None)
+
+    with profiler.phase("text"):
+        # Write the name and stats of the card (pasted from the text run cache when seen before).
+        layout.draw_text(card_image, "name", card.name)
+        layout.draw_text(card_image, "hp", f"{card.hp} PV")
+        layout.draw_text(card_image, "atk", f"{card.atk} ATK")
+        layout.draw_text(card_image, "res", f"{card.res} RES")
+        layout.draw_text(card_image, "spd", f"{card.spd} SPD")
+
+        # Write the rarity of the Pokémon.
+        layout.draw_text(
+            card_image, f"rarity_{card.rarity.index}", RARITY_SYMBOLS[card.rarity.index]
+        )
 
     return card_image
 
 
-def card_from_json(data: dict) -> Card:
-    card = Card(
-        index=data["index"],
-        name=data["name"],
-        rarity=PokemonRarity.get_rarity_by_name(data["rarity"]),
-        hp=data["hp"],
-        atk=data["atk"],
-        res=data["res"],
-        spd=data["spd"],
-
-
-    )
-    return card
-
-
 def ability_from_json(data: dict) -> Ability:
     return Ability(
         name=data["name"],
@@ -186,8 +401,120 @@ def main():
         help="File path to the collection to render",
         default="output/pokemon-classic",
     )
-    collection_path = argparser.parse_args().collection
-    render_cards(collection_path)
+    argparser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes to render with (1 renders serially).",
+    )
+    argparser.add_argument(
+        "-i",
+        "--incremental",
+        action="store_true",
+        help="Only re-render cards whose JSON, art, template or fonts changed.",
+    )
+    argparser.add_argument(
+        "-b",
+        "--binary",
+        action="store_true",
+        help="Read the cards from the collection's binary (.pkcb) file instead of its JSON files "
+        "(write it with `python -m src.content.binary_collection to-binary <collection>`).",
+    )
+    argparser.add_argument(
+        "-a",
+        "--atlas",
+        action="store_true",
+        help="Pack the renders into sprite sheets with a JSON manifest instead of one PNG per card.",
+    )
+    argparser.add_argument(
+        "--atlas-thumbnail-width",
+        type=int,
+        default=None,
+        help="Also pack thumbnails of this width (in pixels) into their own sprite sheets.",
+    )
+    argparser.add_argument(
+        "--atlas-sheet-size",
+        type=int,
+        default=DEFAULT_MAX_SHEET_SIZE,
+        help="Maximum width and height of a sprite sheet, in pixels.",
+    )
+    argparser.add_argument(
+        "--levels",
+        default="full",
+        help='Comma separated resolutions to save, e.g. "full,50%%,128px". '
+        "Each smaller level is downscaled from the previous one.",
+    )
+    argparser.add_argument(
+        "--format",
+        choices=list(IMAGE_FORMATS),
+        default=DEFAULT_IMAGE_FORMAT,
+        help="Image format of the renders.",
+    )
+    argparser.add_argument(
+        "--quality",
+        type=int,
+        default=None,
+        help="Encoding quality (0-100) for webp and avif.",
+    )
+    argparser.add_argument(
+        "--compress-level",
+        type=int,
+        default=None,
+        help="Compression effort: 0-9 for png, 0-6 for webp, 0-10 for avif (higher is smaller, slower).",
+    )
+    argparser.add_argument(
+        "--profile",
+        action="store_true",
+        help=f"Time each render phase per card and write a report to {RENDER_PROFILE_NAME}.",
+    )
+    args = argparser.parse_args()
+    if args.binary and args.incremental:
+        argparser.error("--incremental isn't supported with --binary.")
+    if args.atlas:
+        # The atlas renders full size PNG cards from the JSON files.
+        unsupported_flags = {
+            "--binary": args.binary,
+            "--incremental": args.incremental,
+            "--levels": args.levels != "full",
+            "--format": args.format != DEFAULT_IMAGE_FORMAT,
+            "--quality": args.quality is not None,
+            "--compress-level": args.compress_level is not None,
+        }
+        for flag, is_set in unsupported_flags.items():
+            if is_set:
+                argparser.error(f"{flag} isn't supported with --atlas.")
+    elif args.atlas_thumbnail_width is not None or args.atlas_sheet_size != DEFAULT_MAX_SHEET_SIZE:
+        argparser.error("--atlas-thumbnail-width and --atlas-sheet-size require --atlas.")
+    configure_render_profiler(enabled=args.profile)
+    output = RenderOutput(
+        levels=parse_levels(args.levels),
+        image_format=args.format,
+        quality=args.quality,
+        compress_level=args.compress_level,
+    )
+    if args.atlas:
+        render_card_atlas(
+            args.collection,
+            workers=args.workers,
+            thumbnail_width=args.atlas_thumbnail_width,
+            max_sheet_size=args.atlas_sheet_size,
+        )
+    elif args.binary:
+        render_binary_cards(args.collection, workers=args.workers, output=output)
+    else:
+        render_cards(
+            args.collection,
+            workers=args.workers,
+            incremental=args.incremental,
+            output=output,
+        )
+
+    if args.profile:
+        report_path = pathlib.Path(args.collection, RENDER_PROFILE_NAME)
+        render_profiler().save(report_path)
+        render_profiler().log_report()
+        print(f"Render profile saved to {report_path}.")
 
 
 if __name__ == "__main__":
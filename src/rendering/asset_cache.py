@@ -0,0 +1,53 @@
+from PIL import ImageFont
+
+
+class AssetCache:
+    """Keeps fonts in memory so each is loaded once per process.
+
+    Card templates are kept by the resource registry.
+    """
+
+    SINGLETON_CACHE = None
+
+    def __init__(self):
+        self.fonts: dict[tuple[str, int], ImageFont.FreeTypeFont] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_font(self, font_path: str, size: int) -> ImageFont.FreeTypeFont:
+        # Fonts are never modified when drawing, so the same instance can be shared.
+        key = (font_path, size)
+        font = self.fonts.get(key)
+        if font is None:
+            self.misses += 1
+            font = ImageFont.truetype(font_path, size)
+            self.fonts[key] = font
+        else:
+            self.hits += 1
+        return font
+
+    def warm_up(self, fonts: list[tuple[str, int]]):
+        """Loads the given fonts ahead of time (e.g. once per worker process)."""
+        for font_path, size in fonts:
+            if (font_path, size) not in self.fonts:
+                self.get_font(font_path, size)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "fonts": len(self.fonts),
+        }
+
+    def log_stats(self):
+        stats = self.stats()
+        print(
+            f"Asset cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['fonts']} fonts loaded)"
+        )
+
+
+def asset_cache() -> AssetCache:
+    if AssetCache.SINGLETON_CACHE is None:
+        AssetCache.SINGLETON_CACHE = AssetCache()
+    return AssetCache.SINGLETON_CACHE
@@ -0,0 +1,123 @@
+from dataclasses import dataclass, field
+
+from PIL import Image, ImageFont
+
+from src.rendering.text_cache import text_run_cache
+
+
+@dataclass(frozen=True)
+class TextField:
+    """Where and how one piece of text is drawn on the card."""
+
+    position: tuple[int, int]
+    font: ImageFont.FreeTypeFont
+    anchor: str
+    fill: tuple[int, int, int] = (0, 0, 0)
+
+    def draw(self, image: Image.Image, text: str):
+        text_run_cache().draw(image, self.position, text, self.font, self.fill, self.anchor)
+
+
+@dataclass(frozen=True)
+class ArtPlacement:
+    """Where art of a given size lands on the card, clipped to the card's bounds."""
+
+    resized_size: tuple[int, int]
+    box: tuple[int, int, int, int]  # The part of the card the art covers.
+    offset: tuple[int, int]  # Where the resized art goes, relative to the box.
+    template_region: Image.Image  # The template over the box, to composite onto the art.
+
+
+@dataclass
+class CardLayout:
+    """A card template with everything about its layout that doesn't change per card.
+
+    Outside of the art, a card is always the template pasted over a transparent
+    canvas, so that is computed once (`base`). Per card, only the art's box is
+    composited, and the text is drawn at precomputed anchors with preloaded fonts.
+    """
+
+    template: Image.Image
+    base: Image.Image
+    art_center: tuple[float, float]
+    art_width: int
+    text_fields: dict[str, TextField]
+    _art_placements: dict[tuple[int, int], ArtPlacement] = field(default_factory=dict)
+
+    @classmethod
+    def compile(
+        cls,
+        template: Image.Image,
+        art_center: tuple[float, float],
+        art_width: int,
+        text_fields: dict[str, TextField],
+    ) -> "CardLayout":
+        template = template.convert("RGBA")
+        base = Image.new("RGBA", template.size, (0, 0, 0, 0))
+        base.paste(template, (0, 0), template)
+        return cls(
+            template=template,
+            base=base,
+            art_center=art_center,
+            art_width=art_width,
+            text_fields=text_fields,
+        )
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return self.template.size
+
+    def art_placement(self, art_size: tuple[int, int]) -> ArtPlacement:
+        """Returns (and remembers) the placement of art of the given original size."""
+        placement = self._art_placements.get(art_size)
+        if placement is None:
+            placement = self._compute_art_placement(art_size)
+            self._art_placements[art_size] = placement
+        return placement
+
+    def _compute_art_placement(self, art_size: tuple[int, int]) -> ArtPlacement:
+        # Rescale the art to fit the card, then center it.
+        rescale_factor = self.art_width / art_size[0]
+        resized_size = (int(art_size[0] * rescale_factor), int(art_size[1] * rescale_factor))
+        x = int(self.art_center[0] - resized_size[0] / 2)
+        y = int(self.art_center[1] - resized_size[1] / 2)
+
+        box = (
+            max(x, 0),
+            max(y, 0),
+            min(x + resized_size[0], self.size[0]),
+            min(y + resized_size[1], self.size[1]),
+        )
+        return ArtPlacement(
+            resized_size=resized_size,
+            box=box,
+            offset=(x - box[0], y - box[1]),
+            template_region=self.template.crop(box),
+        )
+
+    def compose(self, art_image: Image.Image | None) -> Image.Image:
+        """Returns a new card image with the art under the template (or just the template)."""
+        if art_image is None:
+            return self.template.copy()
+        return self.composite(self.resize_art(art_image))
+
+    def resize_art(self, art_image: Image.Image) -> tuple[Image.Image, ArtPlacement]:
+        placement = self.art_placement(art_image.size)
+        return art_image.resize(placement.resized_size), placement
+
+    def composite(self, resized_art: tuple[Image.Image, ArtPlacement]) -> Image.Image:
+        """Returns a new card image with the (resize_art) art under the template."""
+        art_image, placement = resized_art
+        box = placement.box
+        card_image = self.base.copy()
+        if box[2] <= box[0] or box[3] <= box[1]:
+            return card_image
+
+        region = Image.new("RGBA", (box[2] - box[0], box[3] - box[1]), (0, 0, 0, 0))
+        region.paste(art_image, placement.offset)
+        region.paste(placement.template_region, (0, 0), placement.template_region)
+        card_image.paste(region, box[:2])
+        return card_image
+
+    def draw_text(self, card_image: Image.Image, field_name: str, text: str):
+        self.text_fields[field_name].draw(card_image, text)
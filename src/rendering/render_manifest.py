@@ -0,0 +1,78 @@
+from dataclasses import dataclass, field
+import hashlib
+import json
+import os
+import pathlib
+
+RENDER_MANIFEST_NAME = "_render_manifest.json"
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def hash_files(paths: list[pathlib.Path | str], salt: str = "") -> str:
+    """Returns a content hash covering all the given files (missing files hash as such)."""
+    digest = hashlib.sha256(salt.encode())
+    for path in paths:
+        digest.update(str(pathlib.Path(path).name).encode())
+        if not os.path.exists(path):
+            digest.update(b"<missing>")
+            continue
+
+        with open(path, "rb") as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass
+class RenderManifest:
+    """Remembers the input hash of every rendered card so unchanged cards can be skipped."""
+
+    path: pathlib.Path
+    card_hashes: dict[str, str] = field(default_factory=dict)
+
+    rendered: int = 0
+    skipped: int = 0
+    stale: int = 0
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "RenderManifest":
+        card_hashes = {}
+        if path.exists():
+            with open(path) as f:
+                card_hashes = json.load(f)
+        return cls(path=path, card_hashes=card_hashes)
+
+    def needs_render(
+        self, card_key: str, card_hash: str, render_paths: list[pathlib.Path]
+    ) -> bool:
+        previous_hash = self.card_hashes.get(card_key)
+        if previous_hash == card_hash and all(path.exists() for path in render_paths):
+            self.skipped += 1
+            return False
+
+        if previous_hash is not None and previous_hash != card_hash:
+            self.stale += 1
+        return True
+
+    def mark_rendered(self, card_key: str, card_hash: str):
+        self.card_hashes[card_key] = card_hash
+        self.rendered += 1
+
+    def prune(self, card_keys: set[str]):
+        """Forgets any cards that are no longer in the collection."""
+        self.card_hashes = {
+            key: value for key, value in self.card_hashes.items() if key in card_keys
+        }
+
+    def save(self):
+        # Write to a temporary file first so an interrupted run never corrupts the manifest.
+        temporary_path = self.path.with_suffix(".tmp")
+        with open(temporary_path, "w") as f:
+            json.dump(self.card_hashes, f, indent=2, sort_keys=True)
+        os.replace(temporary_path, self.path)
+
+    def log_summary(self):
+        print(
+            f"Incremental render: {self.rendered} rendered, {self.skipped} skipped, "
+            f"{self.stale} stale."
+        )
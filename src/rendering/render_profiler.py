@@ -0,0 +1,120 @@
+from contextlib import contextmanager
+import json
+import math
+import os
+import pathlib
+import time
+
+RENDER_PROFILE_NAME = "_render_profile.json"
+
+# In the order they happen when rendering a card.
+RENDER_PHASES = ["template", "art_decode", "art_resize", "composite", "text", "encode"]
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if len(sorted_values) == 0:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class RenderProfiler:
+    """Times each phase of every card render, when enabled.
+
+    Each `phase` block records one sample, so across a run every phase has one
+    timing per card. Disabled (the default), the blocks cost next to nothing.
+    """
+
+    SINGLETON_PROFILER = None
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.timings: dict[str, list[float]] = {phase: [] for phase in RENDER_PHASES}
+
+    @contextmanager
+    def phase(self, name: str):
+        if not self.enabled:
+            yield
+            return
+
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings.setdefault(name, []).append(time.perf_counter() - start_time)
+
+    def take_timings(self) -> dict[str, list[float]]:
+        """Returns the timings recorded so far and starts over (e.g. to send them from a worker)."""
+        timings = self.timings
+        self.timings = {phase: [] for phase in RENDER_PHASES}
+        return timings
+
+    def merge(self, timings: dict[str, list[float]]):
+        for name, samples in timings.items():
+            self.timings.setdefault(name, []).extend(samples)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Returns the count, total, mean, p50, p95 and max (in seconds) of each phase."""
+        summary = {}
+        for name, samples in self.timings.items():
+            if len(samples) == 0:
+                continue
+            sorted_samples = sorted(samples)
+            total = sum(sorted_samples)
+            summary[name] = {
+                "count": len(sorted_samples),
+                "total": total,
+                "mean": total / len(sorted_samples),
+                "p50": percentile(sorted_samples, 0.50),
+                "p95": percentile(sorted_samples, 0.95),
+                "max": sorted_samples[-1],
+            }
+        return summary
+
+    def save(self, path: pathlib.Path):
+        report = {"phases": RENDER_PHASES, "summary": self.summary()}
+        temporary_path = pathlib.Path(path).with_suffix(".tmp")
+        with open(temporary_path, "w") as f:
+            json.dump(report, f, indent=2)
+        os.replace(temporary_path, path)
+
+    def report(self) -> str:
+        summary = self.summary()
+        all_phases_total = sum(phase["total"] for phase in summary.values())
+        lines = [
+            f"{'phase':<12} {'cards':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'share':>7}"
+        ]
+        for name, phase in summary.items():
+            share = phase["total"] / all_phases_total if all_phases_total > 0 else 0.0
+            lines.append(
+                f"{name:<12} {phase['count']:>6} {phase['p50'] * 1000:>9.2f} "
+                f"{phase['p95'] * 1000:>9.2f} {phase['max'] * 1000:>9.2f} {share:>7.1%}"
+            )
+        return "\n".join(lines)
+
+    def log_report(self):
+        print("Render profile (per card):")
+        print(self.report())
+
+
+def render_profiler() -> RenderProfiler:
+    if RenderProfiler.SINGLETON_PROFILER is None:
+        RenderProfiler.SINGLETON_PROFILER = RenderProfiler()
+    return RenderProfiler.SINGLETON_PROFILER
+
+
+def configure_render_profiler(enabled: bool) -> RenderProfiler:
+    RenderProfiler.SINGLETON_PROFILER = RenderProfiler(enabled=enabled)
+    return RenderProfiler.SINGLETON_PROFILER
+
+
+def run_profiled(function, *args):
+    """Runs a render function with profiling on, returning its result and the timings.
+
+    Meant for worker processes, whose profiler the parent can't see.
+    """
+    render_profiler().enabled = True
+    render_profiler().take_timings()
+    result = function(*args)
+    return result, render_profiler().take_timings()
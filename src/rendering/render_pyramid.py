@@ -0,0 +1,141 @@
+from dataclasses import dataclass
+import pathlib
+from typing import Iterator
+
+from PIL import Image
+
+IMAGE_FORMATS = {"png": "PNG", "webp": "WEBP", "avif": "AVIF"}
+DEFAULT_IMAGE_FORMAT = "png"
+
+
+@dataclass(frozen=True)
+class RenderLevel:
+    """One resolution of a render: either a scale of the full card, or a fixed width."""
+
+    name: str
+    scale: float | None = None
+    width: int | None = None
+
+    @classmethod
+    def parse(cls, text: str) -> "RenderLevel":
+        """Parses "full", a percentage like "50%" or a width in pixels like "128px"."""
+        text = text.strip().lower()
+        if text == "full":
+            return FULL_LEVEL
+        if text.endswith("%"):
+            percent = float(text[:-1])
+            return cls(name=f"{percent:g}pct", scale=percent / 100)
+        if text.endswith("px"):
+            width = int(text[:-2])
+            return cls(name=f"{width}px", width=width)
+        raise ValueError(f'Unknown render level "{text}" (expected full, N% or Npx).')
+
+    def size_for(self, full_size: tuple[int, int]) -> tuple[int, int]:
+        full_width, full_height = full_size
+        scale = self.scale if self.width is None else self.width / full_width
+        return max(1, round(full_width * scale)), max(1, round(full_height * scale))
+
+
+FULL_LEVEL = RenderLevel(name="full", scale=1.0)
+
+
+def parse_levels(text: str) -> tuple[RenderLevel, ...]:
+    """Parses a comma separated list of levels, e.g. "full,50%,128px"."""
+    levels = [RenderLevel.parse(level) for level in text.split(",") if level.strip()]
+    return tuple(dict.fromkeys(levels))
+
+
+@dataclass(frozen=True)
+class RenderOutput:
+    """Which resolutions of each card to save, and how to encode them.
+
+    `compress_level` trades encode time for file size: 0-9 for PNG (zlib level),
+    0-6 for WebP (method) and 0-10 for AVIF (10 - speed). Higher is smaller and slower.
+    `quality` (0-100) only applies to WebP and AVIF; PNG is always lossless.
+    """
+
+    levels: tuple[RenderLevel, ...] = (FULL_LEVEL,)
+    image_format: str = DEFAULT_IMAGE_FORMAT
+    quality: int | None = None
+    compress_level: int | None = None
+
+    def __post_init__(self):
+        if self.image_format not in IMAGE_FORMATS:
+            raise ValueError(
+                f'Unknown image format "{self.image_format}" '
+                f"(expected one of {', '.join(IMAGE_FORMATS)})."
+            )
+
+    @property
+    def extension(self) -> str:
+        return self.image_format
+
+    def level_path(self, renders_path: pathlib.Path, level: RenderLevel, stem: str) -> pathlib.Path:
+        # Full renders stay at the root of renders/, the other levels get a folder each.
+        folder = renders_path if level == FULL_LEVEL else renders_path / level.name
+        return folder / f"{stem}.{self.extension}"
+
+    def save_options(self) -> dict:
+        options = {}
+        if self.image_format == "png":
+            if self.compress_level is not None:
+                options["compress_level"] = self.compress_level
+        elif self.image_format == "webp":
+            if self.quality is not None:
+                options["quality"] = self.quality
+            if self.compress_level is not None:
+                options["method"] = self.compress_level
+        elif self.image_format == "avif":
+            if self.quality is not None:
+                options["quality"] = self.quality
+            if self.compress_level is not None:
+                options["speed"] = 10 - self.compress_level
+        return options
+
+    def describe(self) -> str:
+        """A stable description of the settings, e.g. to invalidate renders when they change."""
+        levels = ",".join(level.name for level in self.levels)
+        return f"{levels}|{self.image_format}|{self.quality}|{self.compress_level}"
+
+
+DEFAULT_RENDER_OUTPUT = RenderOutput()
+
+
+def iter_pyramid(
+    image: Image.Image, levels: tuple[RenderLevel, ...]
+) -> Iterator[tuple[RenderLevel, Image.Image]]:
+    """Yields the image at each level, each one downscaled from the level before it.
+
+    Downscaling from the previous (already smaller) level instead of the full image
+    means each step only reads a fraction of the pixels.
+    """
+    full_size = image.size
+    previous = image
+    # Each level is derived from the one before, so go from the largest to the smallest.
+    for level in sorted(levels, key=lambda level: -level.size_for(full_size)[0]):
+        size = level.size_for(full_size)
+        if size != previous.size:
+            factor_x, remainder_x = divmod(previous.width, size[0])
+            factor_y, remainder_y = divmod(previous.height, size[1])
+            if remainder_x == remainder_y == 0 and factor_x == factor_y:
+                # Exact integer reductions (like 50%) use the much cheaper box reduce.
+                previous = previous.reduce(factor_x)
+            else:
+                previous = previous.resize(size, Image.Resampling.LANCZOS)
+        yield level, previous
+
+
+def save_pyramid(
+    image: Image.Image,
+    renders_path: pathlib.Path,
+    stem: str,
+    output: RenderOutput = DEFAULT_RENDER_OUTPUT,
+) -> list[pathlib.Path]:
+    """Saves every level of the image, returning the saved paths (largest first)."""
+    saved_paths = []
+    for level, level_image in iter_pyramid(image, output.levels):
+        path = output.level_path(renders_path, level, stem)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        level_image.save(path, IMAGE_FORMATS[output.image_format], **output.save_options())
+        saved_paths.append(path)
+    return saved_paths
@@ -0,0 +1,73 @@
+import pathlib
+
+from PIL import Image
+
+from src.mechanics.element import NEUTRAL, Element
+
+# Anchored to the package rather than the working directory, so scripts run from anywhere.
+RESOURCES_PATH = pathlib.Path(__file__).resolve().parents[2] / "resources"
+CARD_TEMPLATES_PATH = RESOURCES_PATH / "cards"
+ELEMENT_ICONS_PATH = RESOURCES_PATH / "elements"
+FONTS_PATH = RESOURCES_PATH / "font"
+
+
+def get_card_template_name(element: Element) -> str:
+    return f"{element.name.lower()}_card.png"
+
+
+def get_element_icon_name(element: Element) -> str:
+    return f"{element.name.lower()}_element.png"
+
+
+class ResourceRegistry:
+    """Resolves the card template and icon of each element.
+
+    Each image is decoded the first time it's asked for and then kept in memory,
+    so rendering a mixed-element collection doesn't read any asset per card. The
+    returned images are shared: copy them before drawing on them.
+    """
+
+    SINGLETON_REGISTRY = None
+
+    def __init__(self, resources_path: pathlib.Path = RESOURCES_PATH):
+        self.card_templates_path = resources_path / "cards"
+        self.element_icons_path = resources_path / "elements"
+        self.template_paths: dict[str, pathlib.Path] = {}
+        self.images: dict[pathlib.Path, Image.Image] = {}
+
+    def card_template_path(self, element: Element) -> pathlib.Path:
+        path = self.template_paths.get(element.name)
+        if path is None:
+            path = self.card_templates_path / get_card_template_name(element)
+            if not path.exists() and element.name != NEUTRAL.name:
+                # Print in yellow ASCII.
+                print(f"\033[93m [WARN] {path} not found, using the neutral template.\033[0m")
+                path = self.card_template_path(NEUTRAL)
+            self.template_paths[element.name] = path
+        return path
+
+    def element_icon_path(self, element: Element) -> pathlib.Path:
+        return self.element_icons_path / get_element_icon_name(element)
+
+    def card_template_paths(self) -> list[pathlib.Path]:
+        return sorted(self.card_templates_path.glob("*_card.png"))
+
+    def card_template(self, element: Element) -> Image.Image:
+        return self.get_image(self.card_template_path(element))
+
+    def element_icon(self, element: Element) -> Image.Image:
+        return self.get_image(self.element_icon_path(element))
+
+    def get_image(self, path: pathlib.Path) -> Image.Image:
+        image = self.images.get(path)
+        if image is None:
+            with Image.open(path) as opened_image:
+                image = opened_image.convert("RGBA")
+            self.images[path] = image
+        return image
+
+
+def resource_registry() -> ResourceRegistry:
+    if ResourceRegistry.SINGLETON_REGISTRY is None:
+        ResourceRegistry.SINGLETON_REGISTRY = ResourceRegistry()
+    return ResourceRegistry.SINGLETON_REGISTRY
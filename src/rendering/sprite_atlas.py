@@ -0,0 +1,159 @@
+import json
+import os
+import pathlib
+import shutil
+
+from PIL import Image
+
+ATLAS_FOLDER_NAME = "atlas"
+ATLAS_MANIFEST_NAME = "atlas.json"
+DEFAULT_MAX_SHEET_SIZE = 4096
+
+
+class SpriteSheetPacker:
+    """Packs equally sized sprites into a grid of sheets, left to right then top to bottom.
+
+    Only the sheet being filled is kept in memory: it's saved and dropped as soon as
+    it's full, so the number of sprites packed doesn't change the memory used.
+    """
+
+    def __init__(self, atlas_path: pathlib.Path, name: str, max_sheet_size: int):
+        self.atlas_path = atlas_path
+        self.name = name
+        self.max_sheet_size = max_sheet_size
+        self.sheets: list[dict] = []
+
+        self.cell_size: tuple[int, int] | None = None
+        self.columns = 0
+        self.rows = 0
+        self._sheet: Image.Image | None = None
+        self._sheet_count = 0  # Sprites on the sheet being filled.
+
+    def add(self, image: Image.Image) -> dict:
+        """Pastes the sprite onto the current sheet and returns where it was placed."""
+        if self.cell_size is None:
+            self.cell_size = image.size
+            self.columns = max(1, self.max_sheet_size // image.width)
+            self.rows = max(1, self.max_sheet_size // image.height)
+        elif image.width > self.cell_size[0] or image.height > self.cell_size[1]:
+            raise ValueError(
+                f"{self.name} sprite of size {image.size} doesn't fit in a "
+                f"{self.cell_size} cell."
+            )
+
+        if self._sheet is None:
+            self._sheet = Image.new(
+                "RGBA",
+                (self.columns * self.cell_size[0], self.rows * self.cell_size[1]),
+                (0, 0, 0, 0),
+            )
+
+        x = (self._sheet_count % self.columns) * self.cell_size[0]
+        y = (self._sheet_count // self.columns) * self.cell_size[1]
+        self._sheet.paste(image, (x, y))
+        self._sheet_count += 1
+        coordinates = {
+            "sheet": len(self.sheets),
+            "x": x,
+            "y": y,
+            "width": image.width,
+            "height": image.height,
+        }
+
+        if self._sheet_count == self.columns * self.rows:
+            self.flush()
+        return coordinates
+
+    def flush(self):
+        """Saves the current sheet, cropped to the rows that were used."""
+        if self._sheet is None:
+            return
+
+        used_rows = -(-self._sheet_count // self.columns)
+        used_columns = min(self._sheet_count, self.columns)
+        sheet = self._sheet.crop(
+            (0, 0, used_columns * self.cell_size[0], used_rows * self.cell_size[1])
+        )
+        file_name = f"{self.name}_{len(self.sheets):03d}.png"
+        sheet.save(self.atlas_path / file_name)
+        self.sheets.append(
+            {"file": file_name, "width": sheet.width, "height": sheet.height}
+        )
+        self._sheet = None
+        self._sheet_count = 0
+
+
+class SpriteAtlasWriter:
+    """Writes rendered cards (and optionally thumbnails) into sprite sheets.
+
+    The manifest maps each card's render name to its position in the sheets, so a
+    client can load a few sheets instead of one image per card.
+
+    The atlas is built in a staging folder and only replaces the previous one once
+    every card is packed, so a failed run leaves the previous atlas intact.
+    """
+
+    def __init__(
+        self,
+        collection_path: str,
+        thumbnail_width: int | None = None,
+        max_sheet_size: int = DEFAULT_MAX_SHEET_SIZE,
+    ):
+        self.atlas_path = pathlib.Path(collection_path, ATLAS_FOLDER_NAME)
+        self.staging_path = pathlib.Path(collection_path, f".{ATLAS_FOLDER_NAME}.staging")
+        self.thumbnail_width = thumbnail_width
+        self.cards: dict[str, dict] = {}
+
+        self.packers = {"cards": SpriteSheetPacker(self.staging_path, "cards", max_sheet_size)}
+        if thumbnail_width is not None:
+            self.packers["thumbnails"] = SpriteSheetPacker(
+                self.staging_path, "thumbnails", max_sheet_size
+            )
+
+    def __enter__(self) -> "SpriteAtlasWriter":
+        if os.path.exists(self.staging_path):
+            shutil.rmtree(self.staging_path)
+        os.makedirs(self.staging_path)
+        return self
+
+    def add_card(self, render_name: str, card_image: Image.Image):
+        key = pathlib.Path(render_name).stem
+        self.cards[key] = {"cards": self.packers["cards"].add(card_image)}
+
+        if self.thumbnail_width is not None:
+            thumbnail_height = round(
+                card_image.height * self.thumbnail_width / card_image.width
+            )
+            thumbnail = card_image.resize(
+                (self.thumbnail_width, thumbnail_height), Image.Resampling.LANCZOS
+            )
+            self.cards[key]["thumbnails"] = self.packers["thumbnails"].add(thumbnail)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            shutil.rmtree(self.staging_path, ignore_errors=True)
+            return
+
+        for packer in self.packers.values():
+            packer.flush()
+
+        manifest = {
+            "sheets": {name: packer.sheets for name, packer in self.packers.items()},
+            "cards": self.cards,
+        }
+        with open(self.staging_path / ATLAS_MANIFEST_NAME, "w") as f:
+            json.dump(manifest, f, indent=2)
+        self._swap_in_staged_atlas()
+
+        n_sheets = sum(len(packer.sheets) for packer in self.packers.values())
+        print(f"Packed {len(self.cards)} cards into {n_sheets} sheets in {self.atlas_path}.")
+
+    def _swap_in_staged_atlas(self):
+        # Folder renames are atomic, so the atlas folder is always either the old or the new one.
+        previous_path = self.atlas_path.with_name(f".{ATLAS_FOLDER_NAME}.previous")
+        if os.path.exists(previous_path):
+            shutil.rmtree(previous_path)
+        if os.path.exists(self.atlas_path):
+            os.replace(self.atlas_path, previous_path)
+        os.replace(self.staging_path, self.atlas_path)
+        shutil.rmtree(previous_path, ignore_errors=True)
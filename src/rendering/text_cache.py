@@ -0,0 +1,85 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from PIL import Image, ImageDraw, ImageFont
+
+DEFAULT_MAX_TEXT_RUNS = 4096
+
+
+@dataclass(frozen=True)
+class TextRun:
+    """A piece of text rasterized once into an alpha mask, ready to be pasted."""
+
+    mask: Image.Image
+    offset: tuple[int, int]  # Where the mask goes relative to the text's anchor point.
+
+
+class TextRunCache:
+    """Keeps rasterized text runs, keyed by font, size, anchor and text.
+
+    Card stats and rarity symbols come from a small vocabulary, so after the first
+    few cards they are pasted from the cache instead of being shaped and rasterized
+    again. Card names are open-ended, so the least recently used runs are dropped
+    past `max_entries`.
+    """
+
+    SINGLETON_CACHE = None
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_TEXT_RUNS):
+        self.max_entries = max_entries
+        self.runs: OrderedDict[tuple, TextRun] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_run(self, text: str, font: ImageFont.FreeTypeFont, anchor: str) -> TextRun:
+        key = (font.path, font.size, anchor, text)
+        run = self.runs.get(key)
+        if run is not None:
+            self.hits += 1
+            self.runs.move_to_end(key)
+            return run
+
+        self.misses += 1
+        left, top, right, bottom = font.getbbox(text, anchor=anchor)
+        mask = Image.new("L", (max(right - left, 0), max(bottom - top, 0)), 0)
+        ImageDraw.Draw(mask).text((-left, -top), text, font=font, fill=255, anchor=anchor)
+        run = TextRun(mask=mask, offset=(left, top))
+
+        self.runs[key] = run
+        if len(self.runs) > self.max_entries:
+            self.runs.popitem(last=False)
+        return run
+
+    def draw(
+        self,
+        image: Image.Image,
+        position: tuple[int, int],
+        text: str,
+        font: ImageFont.FreeTypeFont,
+        fill: tuple[int, int, int],
+        anchor: str,
+    ):
+        """Draws text like ImageDraw.text (same pixels), reusing the rasterized run."""
+        run = self.get_run(text, font, anchor)
+        if run.mask.width == 0 or run.mask.height == 0:
+            return
+        x = position[0] + run.offset[0]
+        y = position[1] + run.offset[1]
+        ink = fill + (255,) if image.mode == "RGBA" and len(fill) == 3 else fill
+        image.paste(ink, (x, y, x + run.mask.width, y + run.mask.height), run.mask)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "runs": len(self.runs)}
+
+    def log_stats(self):
+        stats = self.stats()
+        print(
+            f"Text run cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['runs']} runs cached)"
+        )
+
+
+def text_run_cache() -> TextRunCache:
+    if TextRunCache.SINGLETON_CACHE is None:
+        TextRunCache.SINGLETON_CACHE = TextRunCache()
+    return TextRunCache.SINGLETON_CACHE
@@ -1,7 +1,10 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import json
+import os
 import random
 import re
 import string
+import time
 
 from src.mechanics.ability import Ability
 from src.mechanics.element import Element
@@ -9,29 +12,105 @@ from src.pokemon_content.pokemon_elements import PokemonElements
 from src.util.gpt_call import gemini_client
 
 DEFAULT_PATH = "../data/ability_names.json"
+# Seconds between checks of whether a library file changed on disk.
+RELOAD_CHECK_INTERVAL = 1.0
 
 
-def get_ability_name(ability: Ability) -> str:
+class AbilityNameIndex:
+    """Ability names by ability key, loaded lazily from one or more library files.
+
+    Names from later files are merged after those of earlier ones. The files are
+    re-read whenever one of them changes on disk, checked at most once every
+    RELOAD_CHECK_INTERVAL seconds rather than on every lookup.
+    """
+
+    SINGLETON_INDEX = None
+
+    def __init__(self, paths: list[str] = None):
+        self.paths = paths or [DEFAULT_PATH]
+        self._names_by_key: dict[str, list[str]] | None = None
+        self._mtimes: list[float] | None = None
+        self._next_reload_check = 0.0
+
+    @property
+    def names_by_key(self) -> dict[str, list[str]]:
+        now = time.monotonic()
+        if self._names_by_key is not None and now < self._next_reload_check:
+            return self._names_by_key
+
+        self._next_reload_check = now + RELOAD_CHECK_INTERVAL
+        mtimes = [os.path.getmtime(path) for path in self.paths]
+        if self._names_by_key is None or mtimes != self._mtimes:
+            self._names_by_key = self._load()
+            self._mtimes = mtimes
+        return self._names_by_key
+
+    def _load(self) -> dict[str, list[str]]:
+        names_by_key = {}
+        for path in self.paths:
+            with open(path, "r") as f:
+                ability_name_map = json.load(f)
+
+            for key, names in ability_name_map.items():
+                merged_names = names_by_key.setdefault(key, [])
+                merged_names.extend(name for name in names if name not in merged_names)
+        return names_by_key
+
+    def get_names(self, key: str) -> list[str]:
+        return self.names_by_key.get(key, [])
+
+
+def ability_name_index() -> AbilityNameIndex:
+    if AbilityNameIndex.SINGLETON_INDEX is None:
+        AbilityNameIndex.SINGLETON_INDEX = AbilityNameIndex()
+    return AbilityNameIndex.SINGLETON_INDEX
+
+
+def configure_ability_name_index(paths: list[str]) -> AbilityNameIndex:
+    """Replaces the shared index with one merged from the given library files."""
+    AbilityNameIndex.SINGLETON_INDEX = AbilityNameIndex(paths)
+    return AbilityNameIndex.SINGLETON_INDEX
+
+
+def get_ability_name(ability: Ability, seen_names: set[str] | None = None) -> str:
+    """Picks a name for the ability, avoiding (and recording) any names in seen_names."""
     key = ability.ability_key
-    with open(DEFAULT_PATH, "r") as f:
-        ability_name_map = json.load(f)
+    potential_names = ability_name_index().get_names(key)
+
+    if len(potential_names) > 0:
+        if seen_names is not None:
+            unseen_names = [name for name in potential_names if name not in seen_names]
+            # Once every name for this key has been used, repeats are unavoidable.
+            if len(unseen_names) > 0:
+                potential_names = unseen_names
 
-    if key in ability_name_map:
-        potential_names = ability_name_map[key]
-        return random.choice(potential_names)
+        name = random.choice(potential_names)
     else:
         print(f"Could not find ability name for {key}")
-        return generate_ability_name(ability, 1)[0]
+        name = generate_ability_name(ability, 1)[0]
 
+    if seen_names is not None:
+        seen_names.add(name)
+    return name
 
-def generate_all_ability_names_to_file(path: str, elements: list[Element]) -> list[str]:
 
-    ability_name_map = {}
-    all_ability_names = set()
+def generate_all_ability_names_to_file(
+    path: str, elements: list[Element], workers: int = 4
+) -> dict[str, list[str]]:
+    """Generates names for every ability key, resuming from the journal of a previous run.
+
+    Each finished key is appended to a JSONL journal next to `path`, so a crash only
+    loses the keys still in flight. Once every key is done the journal is compacted
+    into `path` and removed.
+    """
+    journal_path = f"{path}.journal.jsonl"
+    generated_names = load_ability_name_journal(journal_path)
+
     abilities_per_key = 4
     all_mixed_element_values = [False, True]
     all_cost_values = [1, 2, 3, 4]
 
+    all_abilities = []
     for element, cost, is_mixed_element in [
         (element, cost, is_mixed_element)
         for element in elements
@@ -42,24 +121,81 @@ def generate_all_ability_names_to_file(path: str, elements: list[Element]) -> li
         if element.is_neutral and is_mixed_element:
             continue
 
-        ability = Ability(
-            name="Ability",
-            element=element,
-            cost=cost,
-            is_mixed_element=is_mixed_element,
+        all_abilities.append(
+            Ability(
+                name="Ability",
+                element=element,
+                cost=cost,
+                is_mixed_element=is_mixed_element,
+            )
         )
 
+    pending_abilities = [
+        ability for ability in all_abilities if ability.ability_key not in generated_names
+    ]
+    print(
+        f"Generating {len(pending_abilities)} ability keys "
+        f"({len(all_abilities) - len(pending_abilities)} already in the journal)."
+    )
+
+    with ThreadPoolExecutor(max_workers=workers) as executor, open(
+        journal_path, "a"
+    ) as journal:
         # Generate more names for expensive abilities.
-        abilities = generate_ability_name(ability, abilities_per_key + cost)
+        futures = {
+            executor.submit(generate_ability_name, ability, abilities_per_key + ability.cost): ability
+            for ability in pending_abilities
+        }
+        failed_keys = []
+        for future in as_completed(futures):
+            key = futures[future].ability_key
+            try:
+                generated_names[key] = future.result()
+            except Exception as e:
+                print(f"\033[91m [ERROR] Could not generate names for {key}: {e}\033[0m")
+                failed_keys.append(key)
+                continue
+
+            # Save each key as it finishes so we don't lose progress if something goes wrong.
+            journal.write(json.dumps({"key": key, "names": generated_names[key]}) + "\n")
+            journal.flush()
 
-        # Make sure we don't add anything we've already seen.
-        unique_abilities = [x for x in abilities if x not in all_ability_names]
+    if len(failed_keys) > 0:
+        raise RuntimeError(
+            f"Failed to generate {len(failed_keys)} ability keys, run again to resume."
+        )
+
+    # Make sure we don't add anything we've already seen, in a fixed key order.
+    ability_name_map = {}
+    all_ability_names = set()
+    for ability in all_abilities:
+        names = generated_names[ability.ability_key]
+        unique_abilities = [x for x in names if x not in all_ability_names]
         ability_name_map[ability.ability_key] = unique_abilities
         all_ability_names.update(unique_abilities)
 
-        # Save each step so we don't lose progress if something goes wrong.
-        with open(path, "w") as f:
-            json.dump(ability_name_map, f, indent=2)
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w") as f:
+        json.dump(ability_name_map, f, indent=2)
+    os.replace(temporary_path, path)
+    os.remove(journal_path)
+    return ability_name_map
+
+
+def load_ability_name_journal(journal_path: str) -> dict[str, list[str]]:
+    generated_names = {}
+    if not os.path.exists(journal_path):
+        return generated_names
+
+    with open(journal_path, "r") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # The last line may have been cut off by a crash; that key is simply redone.
+                continue
+            generated_names[entry["key"]] = entry["names"]
+    return generated_names
 
 
 def generate_ability_name(ability: Ability, n: int) -> list[str]:
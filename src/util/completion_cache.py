@@ -0,0 +1,188 @@
+import atexit
+from dataclasses import dataclass
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = "../data/gemini_cache.sqlite"
+DEFAULT_MAX_ENTRIES = 50000
+# Cache hits whose last-used times are written together, instead of one commit per hit.
+LAST_USED_BATCH_SIZE = 256
+
+
+@dataclass
+class Completion:
+    """The text of a model response, shaped so existing callers can read it like an SDK response."""
+
+    text: str
+    cached: bool = False
+
+    def __iter__(self):
+        # Callers iterate over the response candidates.
+        yield self
+
+    @property
+    def choices(self) -> list["Completion"]:
+        return [self]
+
+
+class CompletionCacheMiss(KeyError):
+    pass
+
+
+class CompletionCache:
+    """Content-addressed store of model responses, keyed by model name and prompt text.
+
+    A prompt asked several times in one run is cached once per occurrence, so the
+    n-th repeat replays the n-th answer instead of the first one again. Work that
+    counts occurrences separately (e.g. each shard's process) keys them under its
+    own scope, so two scopes' n-th occurrences don't share an answer.
+
+    Entries are evicted least-recently-used first once the cache holds more than
+    `max_entries`. Last-used times of hits are written in batches (and on close),
+    since they only decide the eviction order. A read-only cache replays recorded
+    responses and never writes.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        read_only: bool = False,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.read_only = read_only
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._pending_last_used: dict[str, int] = {}
+        self._count = 0
+
+        if read_only:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Cannot replay completions, {path} does not exist.")
+            self._connection = sqlite3.connect(
+                f"file:{path}?mode=ro", uri=True, check_same_thread=False
+            )
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                "key TEXT PRIMARY KEY, model TEXT, prompt TEXT, response TEXT, last_used INTEGER)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS completions_last_used ON completions (last_used)"
+            )
+            self._connection.commit()
+            (self._count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM completions"
+            ).fetchone()
+            atexit.register(self.close)
+
+    @staticmethod
+    def key(model: str, prompt: str, occurrence: int = 0, scope: str = "") -> str:
+        # The first unscoped occurrence keeps the plain key, so existing caches still match.
+        key_text = f"{model}\0{prompt}"
+        if occurrence > 0:
+            key_text += f"\0{occurrence}"
+        if scope:
+            key_text += f"\0\0{scope}"
+        return hashlib.sha256(key_text.encode()).hexdigest()
+
+    def get(
+        self, model: str, prompt: str, occurrence: int = 0, scope: str = ""
+    ) -> str | None:
+        key = self.key(model, prompt, occurrence, scope)
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT response FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            if not self.read_only:
+                self._pending_last_used[key] = time.time_ns()
+                if len(self._pending_last_used) >= LAST_USED_BATCH_SIZE:
+                    self._write_last_used()
+                    self._connection.commit()
+            return row[0]
+
+    def put(
+        self, model: str, prompt: str, response: str, occurrence: int = 0, scope: str = ""
+    ):
+        if self.read_only:
+            return
+
+        key = self.key(model, prompt, occurrence, scope)
+        with self._lock:
+            self._write_last_used()
+            is_new = (
+                self._connection.execute(
+                    "SELECT 1 FROM completions WHERE key = ?", (key,)
+                ).fetchone()
+                is None
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?, ?)",
+                (
+                    key,
+                    model,
+                    prompt,
+                    response,
+                    time.time_ns(),
+                ),
+            )
+            if is_new:
+                self._count += 1
+            self._evict()
+            self._connection.commit()
+
+    def _write_last_used(self):
+        if len(self._pending_last_used) == 0:
+            return
+        self._connection.executemany(
+            "UPDATE completions SET last_used = ? WHERE key = ?",
+            [(last_used, key) for key, last_used in self._pending_last_used.items()],
+        )
+        self._pending_last_used = {}
+
+    def _evict(self):
+        # The tracked count only misses entries other processes added, so only recount
+        # (and evict) once it says the cache is full.
+        if self._count <= self.max_entries:
+            return
+        (self._count,) = self._connection.execute(
+            "SELECT COUNT(*) FROM completions"
+        ).fetchone()
+        overflow = self._count - self.max_entries
+        if overflow > 0:
+            self._connection.execute(
+                "DELETE FROM completions WHERE key IN "
+                "(SELECT key FROM completions ORDER BY last_used ASC LIMIT ?)",
+                (overflow,),
+            )
+            self._count = self.max_entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM completions"
+            ).fetchone()
+        return count
+
+    def close(self):
+        with self._lock:
+            if self._connection is None:
+                return
+            if not self.read_only:
+                self._write_last_used()
+                self._connection.commit()
+            self._connection.close()
+            self._connection = None
@@ -1,16 +1,95 @@
+import asyncio
+from concurrent.futures import Executor
+from dataclasses import dataclass
+import json
 import os
+import statistics
+import threading
+import time
 from functools import cached_property
 import google.generativeai as genai
 from dotenv import load_dotenv
 from retry import retry
 
+from src.util.completion_cache import (
+    DEFAULT_CACHE_PATH,
+    DEFAULT_MAX_ENTRIES,
+    Completion,
+    CompletionCache,
+    CompletionCacheMiss,
+)
+
+GEMINI_MODEL_NAME = "gemini-1.5-flash"
+
+# How completions are cached (set with GEMINI_CACHE_MODE in .env).
+CACHE_MODE_OFF = "off"
+CACHE_MODE_READ_WRITE = "readwrite"
+CACHE_MODE_REPLAY = "replay"  # Offline, read-only: only recorded prompts can be answered.
+
+
+@dataclass
+class CallMetrics:
+    latency: float  # Seconds, including retries.
+    prompt_tokens: int = 0
+    response_tokens: int = 0
+    cached: bool = False
+
 
 class GeminiAIClient:
 
     SINGLETON_CLIENT = None
 
+    def __init__(
+        self, model_name: str = GEMINI_MODEL_NAME, generation_config: dict | None = None
+    ):
+        self.model_name = model_name
+        self.generation_config = generation_config or {}
+        self.call_metrics: list[CallMetrics] = []
+
+        # How many times each prompt was asked so far (within the cache scope), to key
+        # the cache per occurrence.
+        self.cache_scope = ""
+        self._prompt_occurrences: dict[str, int] = {}
+        self._occurrences_lock = threading.Lock()
+
+    @cached_property
+    def model(self) -> genai.GenerativeModel:
+        """The configured model, created once and reused for every call."""
+        load_dotenv()
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        return genai.GenerativeModel(
+            self.model_name, generation_config=self.generation_config or None
+        )
+
+    @cached_property
+    def cache_namespace(self) -> str:
+        # Different models or generation parameters give different answers to the same prompt.
+        if not self.generation_config:
+            return self.model_name
+        return f"{self.model_name}:{json.dumps(self.generation_config, sort_keys=True)}"
+
+    @cached_property
+    def cache_mode(self) -> str:
+        load_dotenv()
+        return os.getenv("GEMINI_CACHE_MODE", CACHE_MODE_READ_WRITE).lower()
+
+    @cached_property
+    def completion_cache(self) -> CompletionCache | None:
+        if self.cache_mode == CACHE_MODE_OFF:
+            return None
+
+        return CompletionCache(
+            path=os.getenv("GEMINI_CACHE_PATH", DEFAULT_CACHE_PATH),
+            max_entries=int(os.getenv("GEMINI_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+            read_only=self.cache_mode == CACHE_MODE_REPLAY,
+        )
+
     @cached_property
     def is_gemini_enabled(self):
+        if self.cache_mode == CACHE_MODE_REPLAY:
+            print("Replaying GEMINI completions from the cache.")
+            return True
+
         print("Checking for OpenAI API key...")
         load_dotenv()
         if os.getenv("GEMINI_API_KEY") is None or os.getenv("GEMINI_API_KEY") == "":
@@ -24,19 +103,100 @@ class GeminiAIClient:
         else:
             return True
 
-    @retry(tries=3, delay=3.0)
-    def get_completion(self, prompt: str):
-        load_dotenv()
-        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    def get_completion(self, prompt: str) -> Completion:
+        start_time = time.perf_counter()
+        cache = self.completion_cache
+        # Repeated prompts (e.g. re-requesting a name that collided) must get fresh
+        # answers, while a same-seed rerun or a replay still matches call for call.
+        occurrence = self.next_prompt_occurrence(prompt)
+        if cache is not None:
+            cached_text = cache.get(self.cache_namespace, prompt, occurrence, self.cache_scope)
+            if cached_text is not None:
+                self.call_metrics.append(
+                    CallMetrics(latency=time.perf_counter() - start_time, cached=True)
+                )
+                return Completion(cached_text, cached=True)
+            if cache.read_only:
+                raise CompletionCacheMiss(f"No recorded completion for prompt: {prompt!r}")
+
+        response = self.generate_content(prompt)
+        usage = getattr(response, "usage_metadata", None)
+        self.call_metrics.append(
+            CallMetrics(
+                latency=time.perf_counter() - start_time,
+                prompt_tokens=getattr(usage, "prompt_token_count", 0),
+                response_tokens=getattr(usage, "candidates_token_count", 0),
+            )
+        )
+
+        if cache is not None:
+            cache.put(self.cache_namespace, prompt, response.text, occurrence, self.cache_scope)
+        return Completion(response.text)
 
-        model = genai.GenerativeModel("gemini-1.5-flash")
+    def reset_metrics(self):
+        self.call_metrics = []
 
-        response = model.generate_content(f"{prompt}")
+    def next_prompt_occurrence(self, prompt: str) -> int:
+        with self._occurrences_lock:
+            occurrence = self._prompt_occurrences.get(prompt, 0)
+            self._prompt_occurrences[prompt] = occurrence + 1
+        return occurrence
 
-        return response
+    def set_cache_scope(self, scope: str):
+        """Counts prompt occurrences from zero again, keying the cache under `scope`.
+
+        Occurrences are counted per process, so work split over processes (like
+        shards) needs a scope of its own to get fresh answers to the same prompts.
+        """
+        with self._occurrences_lock:
+            self.cache_scope = scope
+            self._prompt_occurrences = {}
+
+    async def get_completion_async(
+        self, prompt: str, executor: Executor | None = None
+    ) -> Completion:
+        # The SDK call blocks, so run it on a worker thread to let other requests proceed.
+        # The loop's default executor has few threads, so concurrent callers pass their own.
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.get_completion, prompt)
+
+    @retry(tries=3, delay=3.0)
+    def generate_content(self, prompt: str):
+        return self.model.generate_content(f"{prompt}")
+
+    def metrics_summary(self) -> dict:
+        network_calls = [metrics for metrics in self.call_metrics if not metrics.cached]
+        latencies = [metrics.latency for metrics in network_calls]
+        return {
+            "calls": len(self.call_metrics),
+            "cached_calls": len(self.call_metrics) - len(network_calls),
+            "total_latency": sum(latencies),
+            "mean_latency": statistics.mean(latencies) if latencies else 0.0,
+            "max_latency": max(latencies, default=0.0),
+            "prompt_tokens": sum(metrics.prompt_tokens for metrics in network_calls),
+            "response_tokens": sum(metrics.response_tokens for metrics in network_calls),
+        }
+
+    def log_metrics(self):
+        summary = self.metrics_summary()
+        print(
+            f"GEMINI ({self.model_name}): {summary['calls']} calls "
+            f"({summary['cached_calls']} cached), "
+            f"{summary['total_latency']:.2f}s total, {summary['mean_latency']:.2f}s mean, "
+            f"{summary['max_latency']:.2f}s max, "
+            f"{summary['prompt_tokens']} prompt / {summary['response_tokens']} response tokens"
+        )
 
 
 def gemini_client():
     if GeminiAIClient.SINGLETON_CLIENT is None:
         GeminiAIClient.SINGLETON_CLIENT = GeminiAIClient()
     return GeminiAIClient.SINGLETON_CLIENT
+
+
+def configure_gemini_client(
+    model_name: str = GEMINI_MODEL_NAME, generation_config: dict | None = None
+) -> GeminiAIClient:
+    """Replaces the shared client with one using the given model and generation parameters."""
+    GeminiAIClient.SINGLETON_CLIENT = GeminiAIClient(model_name, generation_config)
+    return GeminiAIClient.SINGLETON_CLIENT
@@ -0,0 +1,27 @@
+import asyncio
+import threading
+import time
+
+
+class RateLimiter:
+    """Spaces out request starts so no more than `requests_per_second` begin each second.
+
+    The limit holds across event loops, so one limiter can span several asyncio.run calls.
+    """
+
+    def __init__(self, requests_per_second: float | None = None):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    async def wait(self):
+        if self.interval == 0.0:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+
+        if start > now:
+            await asyncio.sleep(start - now)